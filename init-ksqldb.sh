@@ -19,9 +19,7 @@ echo 'Creating table...'
 echo "CREATE TABLE IF NOT EXISTS user_day_statistics AS
     SELECT
         sender_id,
-        COUNT(*) as messages_sent,
-        COUNT_DISTINCT(recipient_id) as recipients_amount,
-        COLLECT_LIST(text) as all_messages
+        COUNT(*) as messages_sent
     FROM messages_stream
     WINDOW TUMBLING (SIZE 24 HOUR)
     GROUP BY sender_id
@@ -10,6 +10,9 @@ CREATE STREAM IF NOT EXISTS messages_stream (
 );
 
 -- 2) Таблица для агрегирования данных по каждому пользователю за сутки
+-- NOTE: уникальные получатели и последние тексты отправителя считаются
+-- в приложении Faust с фиксированной памятью на отправителя (GET /stats/),
+-- COUNT_DISTINCT и COLLECT_LIST здесь росли бы без ограничений
 -- CREATE TABLE IF NOT EXISTS user_statistics AS
 --     SELECT
 --         sender_id,
@@ -23,9 +26,7 @@ CREATE STREAM IF NOT EXISTS messages_stream (
 CREATE TABLE IF NOT EXISTS user_day_statistics AS
     SELECT
         sender_id,
-        COUNT(*) as messages_sent,
-        COUNT_DISTINCT(recipient_id) as recipients_amount,
-        COLLECT_LIST(text) as all_messages
+        COUNT(*) as messages_sent
     FROM messages_stream
     WINDOW TUMBLING (SIZE 24 HOUR)
     GROUP BY sender_id
@@ -46,8 +47,9 @@ SELECT sender_id, messages_sent
 FROM user_day_statistics
 EMIT CHANGES;
 
--- 6) Полная статистика по конкретному пользователю
-SELECT sender_id, messages_sent, recipients_amount, all_messages
+-- 6) Статистика по конкретному пользователю
+-- (уникальные получатели и последние сообщения - GET /stats/?sender_id=1)
+SELECT sender_id, messages_sent
 FROM user_day_statistics
 WHERE sender_id = '1'
 EMIT CHANGES;
@@ -1,28 +1,27 @@
-import random
+# NOTE: первым импортом - отсчет этапов запуска начинается до загрузки faust
+from .src.core.startup import STARTUP  # isort: skip
+
 from collections.abc import Sequence
 from typing import Callable, TypeAlias
 
 import faust
-from faker import Faker
 
 from .src.agents import app_agents
 from .src.core.config import settings
-from .src.core.const import (
-    BADWORD,
-    FORBIDDENWORD,
-    MAX_MOCK_USER_ID,
-    MIN_MOCK_USER_ID,
-    MOCK_MESSAGES_TIMEOUT,
-)
 from .src.core.logger import setup_logger
-from .src.core.types import Message
+from .src.core.types import AppMode
 from .src.dependencies import DEPENDENCIES, AppDependencies
 from .src.tables import create_tables
 from .src.topics import register_topics
 from .src.views.banned_words import banned_words_view
+from .src.views.debug import debug_view
 from .src.views.messages import messages_view
+from .src.views.metrics import metrics_view
+from .src.views.stats import stats_view
 from .src.views.users import users_view
 
+STARTUP.mark("imports")
+
 RegisterMethod: TypeAlias = Sequence[Callable[[faust.App, AppDependencies], None]]
 
 
@@ -47,57 +46,51 @@ def register_views(
 
 register_agents = register_views
 
+# NOTE: при хранилище rocksdb:// таблицы пишутся на диск вместе с оффсетом
+# changelog последней записи - после рестарта воркер догоняет только хвост
+# changelog. Standby-реплики держат копии партиций таблиц на других воркерах
+# для быстрого переключения при ребалансировке.
 app = faust.App(
     settings.app_name,
     broker=settings.broker_address,
     store=settings.data_store,
     value_serializer="raw",
+    table_standby_replicas=settings.table_standby_replicas,
+    **({"datadir": settings.data_dir} if settings.data_dir else {}),
+    # NOTE: по этому адресу другие воркеры пересылают чтения по ключу
+    **({"canonical_url": settings.canonical_url} if settings.canonical_url else {}),
 )
 
 DEPENDENCIES.tables = create_tables(app)
 DEPENDENCIES.topics = register_topics(app)
-DEPENDENCIES.logger = setup_logger(name=settings.logger_name)
-
-register_views(app, DEPENDENCIES, [users_view, banned_words_view, messages_view])
-register_agents(app, DEPENDENCIES, [app_agents])
+DEPENDENCIES.logger = setup_logger(
+    name=settings.logger_name,
+    log_format=settings.log_format,
+    summary_interval=settings.log_summary_interval_sec,
+    sample_every=settings.log_sample_every,
+)
 
-fake = Faker()
+register_views(
+    app,
+    DEPENDENCIES,
+    [
+        users_view,
+        banned_words_view,
+        messages_view,
+        metrics_view,
+        stats_view,
+        debug_view,
+    ],
+)
+agents: list[Callable[[faust.App, AppDependencies], None]] = [app_agents]
+if settings.app_mode == AppMode.DEVELOPMENT:
+    # NOTE: Faker загружается только в режиме разработки
+    from .src.mock import mock_messages
 
+    agents.append(mock_messages)
+register_agents(app, DEPENDENCIES, agents)
 
-@app.timer(interval=MOCK_MESSAGES_TIMEOUT)
-async def periodic_message_sender() -> None:
-    """
-    Периодически отправляет рандомные сообщения в топик сырых сообщений.
-    """
-    sender_id: str = str(random.randint(MIN_MOCK_USER_ID, MAX_MOCK_USER_ID))
-    recipient_id: str = str(random.randint(MIN_MOCK_USER_ID, MAX_MOCK_USER_ID))
-    if sender_id == recipient_id:
-        return
-    text: str = random.choice(
-        (
-            fake.sentence(),
-            fake.text(max_nb_chars=50),
-            fake.catch_phrase(),
-            f"{fake.word()} is a {BADWORD}",
-            f"{fake.word()} is a {FORBIDDENWORD}",
-        )
-    )
-    if DEPENDENCIES.tables.blocked_users.get(recipient_id):
-        if sender_id in DEPENDENCIES.tables.blocked_users.get(recipient_id, set()):
-            DEPENDENCIES.logger.error(
-                "Message from user %s to user %s was not sent because the sender is blocked.",
-                sender_id,
-                recipient_id,
-            )
-    await DEPENDENCIES.topics.messages_raw.send(
-        key=recipient_id,
-        value=Message(
-            sender_id=sender_id,
-            recipient_id=recipient_id,
-            text=text,
-            timestamp=int(fake.unix_time()),
-        ),
-    )
+STARTUP.mark("app_ready")
 
 
 if __name__ == "__main__":
@@ -1,20 +1,60 @@
+import asyncio
 import logging
+import time
+from collections import Counter
+from collections.abc import Sequence
 from functools import partial
-from typing import AsyncGenerator, Final
+from typing import TYPE_CHECKING, AsyncGenerator, Final
 
 import faust
 
 from .core.types import (
     BannedWord,
+    CensorExecutor,
+    CensorHitsSnapshot,
+    CensorPipeline,
     Message,
     OperationType,
+    SenderStats,
     UserBlockingRecord,
 )
+from .core.config import settings
+from .core.const import (
+    BANNED_WORDS_KEY,
+    BANNED_WORDS_VERSION_KEY,
+    CENSOR_STATS_SENDERS_KEY,
+    CENSOR_STATS_VERSION_KEY,
+    CENSOR_STATS_WORDS_KEY,
+    HEAVY_HITTERS_K,
+)
+from .core.metrics import (
+    AGENT_EVENTS,
+    AGENT_LATENCY,
+    CENSOR_HITS,
+    CENSOR_MESSAGES,
+    CENSOR_SECONDS,
+)
+from .core.utils import (
+    banned_words_version,
+    inbox_entry_key,
+    sender_stats_totals_key,
+)
 from .dependencies import AppDependencies
-from .services.censorship import censor_text
+from .services.censorship import censor_many, refresh_vocabulary
+from .services.inbox import InboxCodec
+from .services.sketches import HyperLogLog
+
+if TYPE_CHECKING:
+    # NOTE: пул процессов (multiprocessing) загружается только при
+    # CENSOR_EXECUTOR=process
+    from .services.censor_pool import CensorPool
 
 INTERVAL_TO_GET_BANNED_WORDS_SEC: Final[int] = 3
 AMOUNT_OF_BANNED_WORDS_TO_GET: Final[int] = 100
+# NOTE: пауза перед повтором цензуры или отправки пачки, удваивается
+# после каждой неудачи; число попыток - CENSOR_MAX_ATTEMPTS
+RETRY_DELAY_SEC: Final[float] = 0.5
+RETRY_MAX_DELAY_SEC: Final[float] = 30.0
 
 
 async def banned_word_log(word: BannedWord, logger: logging.Logger) -> None:
@@ -31,10 +71,343 @@ async def banned_word_log(word: BannedWord, logger: logging.Logger) -> None:
         logger.success("user removed word from blacklist: %s", word.word)
 
 
+async def censor_messages(
+    batch: Sequence[Message],
+    dependencies: AppDependencies,
+    censor_pool: "CensorPool | None" = None,
+) -> list[Message]:
+    """
+    Цензура пачки сообщений.
+
+    Сообщения от заблокированных получателем отправителей отбрасываются
+    до цензуры по индексу заблокированных пар. Найденные запрещенные слова
+    и отправители измененных сообщений учитываются в локальных top-K.
+
+    :param batch: Sequence[Message], пачка сообщений из топика сырых сообщений
+    :param dependencies: AppDependencies, зависимости приложения
+    :param censor_pool: CensorPool | None, пул процессов для цензуры
+        :default None, цензура выполняется в event loop
+
+    :raises Exception: ошибка цензуры (например, в пуле процессов)
+
+    :return: list[Message], сообщения с примененной цензурой
+    """
+    blocked_pairs = dependencies.blocked_pairs
+    allowed: list[Message] = []
+    for msg in batch:
+        if blocked_pairs.is_blocked(msg.recipient_id, msg.sender_id):
+            dependencies.logger.sampled(
+                logging.ERROR,
+                "messages from blocked senders dropped",
+                "Message from user %s to user %s was not sent because the sender is blocked.",
+                msg.sender_id,
+                msg.recipient_id,
+            )
+        else:
+            allowed.append(msg)
+    if not allowed:
+        return []
+    batch = allowed
+
+    banned_words: set[str] = dependencies.tables.banned_words.get(
+        BANNED_WORDS_KEY, set()
+    )
+    version = banned_words_version(dependencies.tables.banned_words)
+    texts = [msg.text for msg in batch]
+    hits: list[str] = []
+    with CENSOR_SECONDS.time():
+        if censor_pool is not None:
+            censored_texts = await censor_pool.censor_many(
+                texts, banned_words, version, hits
+            )
+        else:
+            refresh_vocabulary(banned_words, version)
+            censored_texts = censor_many(texts, hits=hits)
+    CENSOR_MESSAGES.inc(len(texts))
+
+    censored_senders: Counter[str] = Counter()
+    for msg, censored in zip(batch, censored_texts):
+        if censored != msg.text:
+            msg.text = censored
+            CENSOR_HITS.inc()
+            censored_senders[msg.sender_id] += 1
+            dependencies.logger.sampled(
+                logging.WARNING,
+                "messages censored",
+                "Message from user %s to user %s was censored.",
+                msg.sender_id,
+                msg.recipient_id,
+            )
+
+    for word, count in Counter(hits).items():
+        dependencies.censored_words.add(word, count)
+    for sender_id, count in censored_senders.items():
+        dependencies.censored_senders.add(sender_id, count)
+    return batch
+
+
+async def dead_letter_messages(
+    batch: Sequence[Message], reason: str, dependencies: AppDependencies
+) -> None:
+    """
+    Отправка сообщений, которые не удалось обработать, в топик dead letter.
+
+    Сообщения, которые не удалось отправить и туда, только пишутся в лог:
+    пачка не должна останавливать партицию.
+
+    :param batch: Sequence[Message], сообщения
+    :param reason: str, причина (последняя ошибка обработки)
+    :param dependencies: AppDependencies, зависимости приложения
+
+    :return: None
+    """
+    dependencies.logger.error(
+        "Moving %d messages to the dead letter topic: %s", len(batch), reason
+    )
+    for msg in await send_messages(
+        batch,
+        dependencies.topics.messages_dead_letter,
+        dependencies,
+        headers={"error": reason.encode()},
+    ):
+        dependencies.logger.error(
+            "Message from user %s to user %s was dropped: %s",
+            msg.sender_id,
+            msg.recipient_id,
+            reason,
+        )
+
+
+async def censor_messages_with_retry(
+    batch: Sequence[Message],
+    dependencies: AppDependencies,
+    censor_pool: "CensorPool | None" = None,
+) -> list[Message]:
+    """
+    Цензура пачки сообщений с повтором.
+
+    Пачку нельзя просто пропустить при ошибке: агент подтвердит ее события,
+    и оффсеты будут закоммичены без сообщений. Пауза между повторами растет
+    от RETRY_DELAY_SEC до RETRY_MAX_DELAY_SEC; после CENSOR_MAX_ATTEMPTS
+    попыток пачка уходит в топик dead letter, чтобы не останавливать
+    партицию.
+
+    :param batch: Sequence[Message], пачка сообщений из топика сырых сообщений
+    :param dependencies: AppDependencies, зависимости приложения
+    :param censor_pool: CensorPool | None, пул процессов для цензуры
+        :default None, цензура выполняется в event loop
+
+    :return: list[Message], сообщения с примененной цензурой; пустой список,
+        если пачка ушла в топик dead letter
+    """
+    delay = RETRY_DELAY_SEC
+    for attempt in range(1, settings.censor_max_attempts + 1):
+        try:
+            return await censor_messages(batch, dependencies, censor_pool)
+        except Exception as e:
+            error = str(e)
+            dependencies.logger.error(
+                "Error censoring batch of %d messages (attempt %d of %d): %s",
+                len(batch),
+                attempt,
+                settings.censor_max_attempts,
+                error,
+            )
+        if attempt < settings.censor_max_attempts:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX_DELAY_SEC)
+    await dead_letter_messages(batch, f"censoring failed: {error}", dependencies)
+    return []
+
+
+async def send_messages(
+    batch: Sequence[Message],
+    topic: faust.TopicT,
+    dependencies: AppDependencies,
+    headers: dict[str, bytes] | None = None,
+) -> list[Message]:
+    """
+    Групповая отправка сообщений в топик.
+
+    Сообщения отправляются с ключом recipient_id без ожидания друг друга,
+    после чего дожидаемся подтверждения брокера для всей группы.
+
+    :param batch: Sequence[Message], сообщения
+    :param topic: faust.TopicT, топик
+    :param dependencies: AppDependencies, зависимости приложения
+    :param headers: dict[str, bytes] | None, заголовки записей
+        :default None
+
+    :return: list[Message], сообщения, которые не удалось отправить
+    """
+    failed: list[Message] = []
+    pending: list[tuple[Message, asyncio.Future]] = []
+    for msg in batch:
+        try:
+            fut = await topic.send(key=msg.recipient_id, value=msg, headers=headers)
+            pending.append((msg, fut))
+        except Exception as e:
+            dependencies.logger.error(
+                "Error sending message from user %s to user %s: %s",
+                msg.sender_id,
+                msg.recipient_id,
+                str(e),
+            )
+            failed.append(msg)
+
+    results = await asyncio.gather(
+        *(fut for _, fut in pending), return_exceptions=True
+    )
+    for (msg, _), result in zip(pending, results):
+        if isinstance(result, BaseException):
+            dependencies.logger.error(
+                "Error sending message from user %s to user %s: %s",
+                msg.sender_id,
+                msg.recipient_id,
+                str(result),
+            )
+            failed.append(msg)
+    return failed
+
+
+async def deliver_censored_messages(
+    censored: list[Message], dependencies: AppDependencies
+) -> list[Message]:
+    """
+    Доставка цензурированной пачки в топик отфильтрованных сообщений.
+
+    События пачки подтверждаются только после выхода из этой функции,
+    поэтому неотправленные сообщения повторяются с растущей паузой
+    (RETRY_DELAY_SEC), а после CENSOR_MAX_ATTEMPTS попыток уходят в топик
+    dead letter, чтобы одна пачка не останавливала партицию.
+
+    :param censored: list[Message], сообщения с примененной цензурой
+    :param dependencies: AppDependencies, зависимости приложения
+
+    :return: list[Message], сообщения, доставленные в топик отфильтрованных сообщений
+    """
+    topic = dependencies.topics.messages_filtered
+    delay = RETRY_DELAY_SEC
+    pending: list[Message] = censored
+    for attempt in range(1, settings.censor_max_attempts + 1):
+        if not (pending := await send_messages(pending, topic, dependencies)):
+            return censored
+        if attempt < settings.censor_max_attempts:
+            dependencies.logger.error(
+                "Retrying %d censored messages in %gs", len(pending), delay
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX_DELAY_SEC)
+    await dead_letter_messages(
+        pending,
+        f"sending to {topic.get_topic_name()} failed "
+        f"{settings.censor_max_attempts} times",
+        dependencies,
+    )
+    failed = {id(msg) for msg in pending}
+    return [msg for msg in censored if id(msg) not in failed]
+
+
+async def censor_messages_batch(
+    batch: Sequence[Message],
+    dependencies: AppDependencies,
+    censor_pool: "CensorPool | None" = None,
+) -> list[Message]:
+    """
+    Цензура пачки сообщений и групповая отправка в топик отфильтрованных сообщений.
+
+    Цензура повторяется так же, как отправка (censor_messages_with_retry,
+    deliver_censored_messages).
+
+    :param batch: Sequence[Message], пачка сообщений из топика сырых сообщений
+    :param dependencies: AppDependencies, зависимости приложения
+    :param censor_pool: CensorPool | None, пул процессов для цензуры
+        :default None, цензура выполняется в event loop
+
+    :return: list[Message], сообщения, доставленные в топик отфильтрованных сообщений
+    """
+    censored = await censor_messages_with_retry(batch, dependencies, censor_pool)
+    return await deliver_censored_messages(censored, dependencies)
+
+
+async def deliver_censored_batches(
+    messages: faust.Stream[Message],
+    pipeline: "asyncio.Queue[tuple[Sequence[faust.EventT], asyncio.Future, float]]",
+    dependencies: AppDependencies,
+) -> None:
+    """
+    Доставка пачек конвейера censor_agent строго в порядке их получения.
+
+    Для каждой пачки дожидается ее цензуры, доставляет сообщения и только
+    после этого подтверждает события пачки, поэтому оффсеты не коммитятся
+    раньше доставки.
+
+    :param messages: faust.Stream[Message], поток агента
+    :param pipeline: asyncio.Queue, события пачки, задача ее цензуры и
+        время получения пачки
+    :param dependencies: AppDependencies, зависимости приложения
+
+    :return: None
+    """
+    while True:
+        events, censoring, taken_at = await pipeline.get()
+        await deliver_censored_messages(await censoring, dependencies)
+        for event in events:
+            await messages.ack(event)
+        AGENT_LATENCY.observe(time.perf_counter() - taken_at, "censor_agent")
+
+
+def store_message(msg: Message, dependencies: AppDependencies) -> None:
+    """
+    Запись сообщения во входящие получателя.
+
+    Сообщение записывается в компактном виде (InboxCodec) отдельным ключом
+    с порядковым номером получателя, после чего счетчик-голова получателя
+    увеличивается. Вызывается только
+    из агента, читающего партицию, которой принадлежит recipient_id.
+
+    Время записи - время события Kafka (не время из сообщения, его задает
+    клиент), но не меньше времени записи предыдущего сообщения получателя:
+    по нему бинарным поиском ищется параметр since в GET /messages/.
+
+    :param msg: Message, сообщение с примененной цензурой
+    :param dependencies: AppDependencies, зависимости приложения
+
+    :return: None
+    """
+    heads_table = dependencies.tables.messages_filtered_heads
+    messages_table = dependencies.tables.messages_filtered
+    sequence: int = heads_table[msg.recipient_id].current()
+    event = faust.current_event()
+    appended_at: float = event.message.timestamp if event else time.time()
+    if sequence:
+        try:
+            previous: bytes = messages_table[
+                inbox_entry_key(msg.recipient_id, sequence - 1)
+            ].current()
+        except KeyError:
+            pass
+        else:
+            appended_at = max(appended_at, InboxCodec.appended_at(previous))
+    messages_table[
+        inbox_entry_key(msg.recipient_id, sequence)
+    ] = dependencies.inbox_codec.encode(msg, appended_at)
+    heads_table[msg.recipient_id] = sequence + 1
+
+
 def app_agents(app: faust.App, dependencies: AppDependencies) -> None:
     """
     Регистрация агентов в приложении.
     """
+    censor_pool: CensorPool | None = None
+    if settings.censor_executor == CensorExecutor.PROCESS:
+        from .services.censor_pool import CensorPool
+
+        censor_pool = CensorPool(size=settings.censor_pool_size)
+
+        @app.on_before_shutdown.connect
+        async def shutdown_censor_pool(app: faust.App, **kwargs) -> None:
+            censor_pool.shutdown()
 
     @app.agent(
         channel=dependencies.topics.banned_words,
@@ -45,99 +418,296 @@ def app_agents(app: faust.App, dependencies: AppDependencies) -> None:
     ) -> AsyncGenerator[BannedWord, None]:
         """
         Агент для обновления списка запрещенных слов.
+
+        При каждом изменении словаря увеличивается его версия, по которой
+        цензор определяет необходимость перестройки автомата.
         """
+        table = dependencies.tables.banned_words
         async for _word in words:
+            AGENT_EVENTS.inc(1, "update_banned_words")
+            with AGENT_LATENCY.time("update_banned_words"):
+                try:
+                    # NOTE: после восстановления из changelog (json) значение - список
+                    current: set = set(table[BANNED_WORDS_KEY])
+                    _operation_type, _value = _word.operation_type, _word.word
+                    if _operation_type == OperationType.ADD and _value not in current:
+                        current.add(_value)
+                    elif _operation_type == OperationType.REMOVE and _value in current:
+                        current.discard(_value)
+                    else:
+                        continue
+                    version = banned_words_version(table) + 1
+                    table[BANNED_WORDS_KEY] = current
+                    table[BANNED_WORDS_VERSION_KEY] = version
+                    refresh_vocabulary(current, version)
+                except Exception as e:
+                    dependencies.logger.error("Error updating banned words: %s", str(e))
+                    continue
+            # NOTE: yield вне замера, время обработки в sink не входит в задержку
+            yield _word
+
+    if settings.censor_pipeline == CensorPipeline.FUSED:
+
+        @app.agent(dependencies.topics.messages_raw)
+        async def censor_and_store_messages(messages: faust.Stream[Message]) -> None:
+            """
+            Агент для цензуры и сохранения сообщений без топика filtered_messages.
+
+            Сообщения обрабатываются по одному: запись в оконную таблицу
+            требует текущего события потока, которого нет внутри take().
+            Ожидания подтверждения брокера здесь нет, поэтому пачки не нужны.
+            Топик messages ключуется recipient_id, поэтому записи таблиц
+            попадают в партицию changelog, соответствующую получателю.
+            """
+            async for msg in messages:
+                AGENT_EVENTS.inc(1, "censor_and_store_messages")
+                with AGENT_LATENCY.time("censor_and_store_messages"):
+                    try:
+                        # NOTE: пустой список - сообщение отброшено блокировкой
+                        for censored in await censor_messages_with_retry(
+                            [msg], dependencies, censor_pool
+                        ):
+                            store_message(censored, dependencies)
+                    except Exception as e:
+                        dependencies.logger.error(
+                            "Error storing message for user %s: %s",
+                            msg.recipient_id,
+                            str(e),
+                        )
+
+    else:
+
+        # NOTE: столько пачек ждут доставки в очереди конвейера, пока
+        # доставляется самая ранняя, поэтому у каждого процесса пула есть
+        # пачка в работе; в event loop цензура последовательна, поэтому без
+        # пула конвейер только совмещает цензуру следующих пачек с отправкой
+        censor_pipeline_depth = censor_pool.size if censor_pool is not None else 1
+
+        @app.agent(dependencies.topics.messages_raw)
+        async def censor_agent(messages: faust.Stream[Message]) -> None:
+            """
+            Агент для цензуры сообщений.
+
+            Сообщения забираются из потока пачками размером до CENSOR_BATCH_SIZE
+            (или за CENSOR_BATCH_LINGER_SEC секунд), пачка цензурируется одним вызовом
+            и отправляется дальше группой. Пачки обрабатываются конвейером: при
+            CENSOR_EXECUTOR=process в пуле одновременно цензурируются до
+            CENSOR_POOL_SIZE пачек, а deliver_censored_batches отправляет их и
+            подтверждает события строго по порядку, поэтому порядок сообщений
+            в партиции сохраняется, а оффсеты коммитятся только после доставки.
+            """
+            pipeline: asyncio.Queue = asyncio.Queue(maxsize=censor_pipeline_depth)
+            delivery = asyncio.ensure_future(
+                deliver_censored_batches(messages, pipeline, dependencies)
+            )
+            try:
+                async for events in messages.noack_take(
+                    settings.censor_batch_size, within=settings.censor_batch_linger_sec
+                ):
+                    AGENT_EVENTS.inc(len(events), "censor_agent")
+                    censoring = asyncio.ensure_future(
+                        censor_messages_with_retry(
+                            [event.value for event in events], dependencies, censor_pool
+                        )
+                    )
+                    queued = asyncio.ensure_future(
+                        pipeline.put((events, censoring, time.perf_counter()))
+                    )
+                    await asyncio.wait(
+                        (queued, delivery), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if delivery.done():
+                        # NOTE: ошибка доставки перезапускает агент, события
+                        # неподтвержденных пачек будут прочитаны заново
+                        queued.cancel()
+                        censoring.cancel()
+                        delivery.result()
+            finally:
+                delivery.cancel()
+                while not pipeline.empty():
+                    pipeline.get_nowait()[1].cancel()
+
+        @app.agent(dependencies.topics.messages_filtered)
+        async def store_filtered_messages(messages: faust.Stream[Message]) -> None:
+            """
+            Агент для сохранения отфильтрованных сообщений в таблицу.
+            """
+            async for msg in messages:
+                AGENT_EVENTS.inc(1, "store_filtered_messages")
+                try:
+                    with AGENT_LATENCY.time("store_filtered_messages"):
+                        store_message(msg, dependencies)
+                except Exception as e:
+                    dependencies.logger.error(
+                        "Error storing message for user %s: %s",
+                        msg.recipient_id,
+                        str(e),
+                    )
+
+    # NOTE: статистика строится по сообщениям после цензуры и проверки
+    # блокировок; в режиме fused топика filtered_messages нет, поэтому
+    # считаются сырые сообщения, а их тексты не сохраняются
+    if settings.censor_pipeline == CensorPipeline.FUSED:
+        stats_source = dependencies.topics.messages_raw
+        stats_repartition = "sender_stats"
+        recent_texts_limit = 0
+    else:
+        stats_source = dependencies.topics.messages_filtered
+        stats_repartition = "filtered_sender_stats"
+        recent_texts_limit = settings.stats_recent_texts
+
+    @app.agent(stats_source)
+    async def collect_sender_stats(messages: faust.Stream[Message]) -> None:
+        """
+        Агент для сбора суточной статистики отправителей.
+
+        Сообщения перераспределяются по sender_id, для каждого отправителя
+        хранятся количество сообщений, HyperLogLog уникальных получателей и
+        не более STATS_RECENT_TEXTS последних текстов. Итоги за сутки
+        (сообщения и отправители) ведутся отдельно по партициям, чтобы
+        GET /stats/ не обходил таблицу отправителей.
+        """
+        stats_table = dependencies.tables.sender_stats
+        totals_table = dependencies.tables.sender_stats_totals
+        async for msg in messages.group_by(Message.sender_id, name=stats_repartition):
+            AGENT_EVENTS.inc(1, "collect_sender_stats")
             try:
-                current: set = dependencies.tables.banned_words.setdefault(
-                    "global", set()
+                partition = faust.current_event().message.partition
+                try:
+                    stats: SenderStats = stats_table[msg.sender_id].current()
+                except KeyError:
+                    stats = SenderStats(
+                        messages_sent=0, recipients_sketch="", recent_texts=[]
+                    )
+                    senders_key = sender_stats_totals_key(partition, "senders")
+                    totals_table[senders_key] = totals_table[senders_key].current() + 1
+                messages_key = sender_stats_totals_key(partition, "messages")
+                totals_table[messages_key] = totals_table[messages_key].current() + 1
+                recipients = HyperLogLog.loads(stats.recipients_sketch)
+                recipients.add(msg.recipient_id)
+                recent_texts: list[str] = []
+                if recent_texts_limit:
+                    recent_texts = [*stats.recent_texts, msg.text][-recent_texts_limit:]
+                stats_table[msg.sender_id] = SenderStats(
+                    messages_sent=stats.messages_sent + 1,
+                    recipients_sketch=recipients.dumps(),
+                    recent_texts=recent_texts,
                 )
-                _operation_type, _value = _word.operation_type, _word.word
-                if _operation_type == OperationType.ADD and _value not in current:
-                    current.add(_value)
-                    yield _word
-                elif _operation_type == OperationType.REMOVE and _value in current:
-                    current.discard(_value)
-                    yield _word
             except Exception as e:
-                dependencies.logger.error("Error updating banned words: %s", str(e))
+                dependencies.logger.error(
+                    "Error updating stats for user %s: %s", msg.sender_id, str(e)
+                )
 
-    @app.agent(dependencies.topics.messages_raw)
-    async def censor_agent(messages: faust.Stream[Message]) -> None:
+    @app.timer(interval=settings.censor_stats_flush_interval_sec)
+    async def flush_censor_stats() -> None:
         """
-        Агент для цензуры сообщений.
+        Выгрузка локальных top-K запрещенных слов и отправителей.
+
+        Накопленные с прошлой выгрузки оценки отправляются в топик
+        статистики цензуры, а локальные скетчи сбрасываются. Если отправка
+        не удалась, оценки возвращаются в скетч и уйдут со следующей выгрузкой.
         """
-        async for msg in messages:
+        for key, heavy_hitters in (
+            (CENSOR_STATS_WORDS_KEY, dependencies.censored_words),
+            (CENSOR_STATS_SENDERS_KEY, dependencies.censored_senders),
+        ):
+            if not (counts := heavy_hitters.top()):
+                continue
+            # NOTE: сброс до отправки - срабатывания, учтенные censor_agent во
+            # время ожидания брокера, не теряются и войдут в следующую выгрузку
+            heavy_hitters.reset()
             try:
-                censored = censor_text(
-                    msg.text, dependencies.tables.banned_words.get("global", set())
+                await dependencies.topics.censor_stats.send(
+                    key=key, value=CensorHitsSnapshot(counts=counts)
                 )
-                if censored != msg.text:
-                    msg.text = censored
-                    dependencies.logger.warning(
-                        "Message from user %s to user %s was censored.",
-                        msg.sender_id,
-                        msg.recipient_id,
-                    )
-                await dependencies.topics.messages_filtered.send(value=msg)
             except Exception as e:
+                for value, count in counts.items():
+                    heavy_hitters.add(value, count)
                 dependencies.logger.error(
-                    "Error censoring message from user %s to user %s: %s",
-                    msg.sender_id,
-                    msg.recipient_id,
-                    str(e),
+                    "Error sending censor stats %s: %s", key, str(e)
                 )
 
-    @app.agent(dependencies.topics.messages_filtered)
-    async def store_filtered_messages(messages: faust.Stream[Message]) -> None:
+    @app.agent(dependencies.topics.censor_stats)
+    async def merge_censor_stats(snapshots: faust.Stream[CensorHitsSnapshot]) -> None:
         """
-        Агент для сохранения отфильтрованных сообщений в таблицу.
+        Суммирование top-K воркеров в суточную статистику цензуры.
+
+        В таблице по каждому ключу хранится не более HEAVY_HITTERS_K значений.
+        Каждое слияние увеличивает счетчик таблицы censor_stats_versions,
+        из которого строится ETag ответа GET /banned_words/stats/.
         """
-        async for msg in messages:
+        stats_table = dependencies.tables.censor_stats
+        versions = dependencies.tables.censor_stats_versions
+        async for key, snapshot in snapshots.items():
             try:
-                window_set = dependencies.tables.messages_filtered.setdefault(
-                    msg.recipient_id, []
+                merged: dict[str, int] = dict(stats_table[key].current())
+                for value, count in snapshot.counts.items():
+                    merged[value] = merged.get(value, 0) + count
+                stats_table[key] = dict(
+                    sorted(merged.items(), key=lambda kv: -kv[1])[:HEAVY_HITTERS_K]
                 )
-                current = window_set.now()
-                if current is None:
-                    current = []
-                current.append(msg)
-                dependencies.tables.messages_filtered[msg.recipient_id] = current
+                versions[CENSOR_STATS_VERSION_KEY] += 1
             except Exception as e:
                 dependencies.logger.error(
-                    "Error storing message for user %s: %s", msg.recipient_id, str(e)
+                    "Error merging censor stats %s: %s", key, str(e)
                 )
 
+    @dependencies.tables.blocked_users.on_recover
+    async def rebuild_blocking_indexes() -> None:
+        """
+        Перестройка индексов заблокированных пар и пользователей после
+        восстановления таблицы.
+        """
+        dependencies.blocked_pairs.rebuild(dependencies.tables.blocked_users.items())
+        dependencies.user_ids.rebuild(dependencies.tables.blocked_users.keys())
+
     @app.agent(dependencies.topics.blocked_users)
     async def process_users_blocking(
         messages: faust.Stream[UserBlockingRecord],
     ) -> None:
         """
         Блокировка и разблокировка пользователей.
+
+        Каждое изменение увеличивает счетчик изменений пользователя, из которого
+        строится ETag ответа GET /users/{user_id}/, и счетчик изменений
+        партиции для ETag списка GET /users/.
         """
+        versions = dependencies.tables.blocked_users_versions
+        changes = dependencies.tables.blocked_users_changes
         async for msg in messages:
-            try:
-                user_id = msg.user_id
-                current: dict = dependencies.tables.blocked_users.setdefault(
-                    user_id, {}
-                )
+            AGENT_EVENTS.inc(1, "process_users_blocking")
+            with AGENT_LATENCY.time("process_users_blocking"):
+                try:
+                    user_id = msg.user_id
+                    partition = faust.current_event().message.partition
+                    current: dict = dependencies.tables.blocked_users.setdefault(
+                        user_id, {}
+                    )
+                    dependencies.user_ids.add(user_id)
 
-                if msg.operation_type == OperationType.REMOVE:  # разблокировка
-                    if msg.blocked_id in current:
-                        del current[msg.blocked_id]
+                    if msg.operation_type == OperationType.REMOVE:  # разблокировка
+                        if msg.blocked_id in current:
+                            del current[msg.blocked_id]
+                            dependencies.tables.blocked_users[user_id] = current
+                            versions[user_id] += 1
+                            changes[partition] += 1
+                            dependencies.blocked_pairs.discard(user_id, msg.blocked_id)
+                            dependencies.logger.success(
+                                "User %s unblocked user %s.", user_id, msg.blocked_id
+                            )
+                    else:  # OperationType.ADD - блокировка
+                        current[msg.blocked_id] = {
+                            "blocking_date": msg.date_blocked,
+                            "comment": msg.comment,
+                        }
                         dependencies.tables.blocked_users[user_id] = current
+                        versions[user_id] += 1
+                        changes[partition] += 1
+                        dependencies.blocked_pairs.add(user_id, msg.blocked_id)
                         dependencies.logger.success(
-                            "User %s unblocked user %s.", user_id, msg.blocked_id
+                            "User %s blocked user %s.", user_id, msg.blocked_id
                         )
-                else:  # OperationType.ADD - блокировка
-                    current[msg.blocked_id] = {
-                        "blocking_date": msg.date_blocked,
-                        "comment": msg.comment,
-                    }
-                    dependencies.tables.blocked_users[user_id] = current
-                    dependencies.logger.success(
-                        "User %s blocked user %s.", user_id, msg.blocked_id
+                except Exception as e:
+                    dependencies.logger.error(
+                        "Error processing blocking for user %s: %s", msg.user_id, str(e)
                     )
-            except Exception as e:
-                dependencies.logger.error(
-                    "Error processing blocking for user %s: %s", msg.user_id, str(e)
-                )
@@ -0,0 +1,50 @@
+from typing import Any
+
+import orjson
+from faust.serializers import codecs
+
+try:
+    import msgpack
+except ImportError:  # NOTE: msgpack нужен только при MSGPACK в настройках топиков
+    msgpack = None
+
+from .types import Serializer
+
+
+class OrjsonCodec(codecs.Codec):
+    """
+    JSON-кодек на orjson: совместим по формату со стандартным json,
+    поэтому подходит для топиков, которые читает ksqlDB.
+    """
+
+    def _dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def _loads(self, s: bytes) -> Any:
+        return orjson.loads(s)
+
+
+class MsgpackCodec(codecs.Codec):
+    """
+    Бинарный кодек на msgpack: компактнее JSON, но не читается ksqlDB.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        if msgpack is None:
+            raise ImportError("msgpack codec requires the msgpack package")
+        super().__init__(*args, **kwargs)
+
+    def _dumps(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def _loads(self, s: bytes) -> Any:
+        return msgpack.unpackb(s, raw=False)
+
+
+def register_codecs() -> None:
+    """
+    Регистрация кодеков приложения в реестре faust.
+    """
+    codecs.register(Serializer.ORJSON, OrjsonCodec())
+    if msgpack is not None:
+        codecs.register(Serializer.MSGPACK, MsgpackCodec())
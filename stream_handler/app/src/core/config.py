@@ -1,18 +1,104 @@
-from pydantic import Field
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
+from .const import MESSAGES_BATCH_MAX_SIZE
+from .types import (
+    AppMode,
+    CensorExecutor,
+    CensorPipeline,
+    InboxCompression,
+    LogFormat,
+    Serializer,
+)
+
 
 class AppSettings(BaseSettings):
     """
     Настройки приложения для потоковой обработки данных.
     """
 
-    data_store: str = Field("memory://", alias="DATA_STORE")
+    data_store: str = Field("rocksdb://", alias="DATA_STORE")
+    data_dir: str | None = Field(None, alias="DATA_DIR")
+    table_standby_replicas: int = Field(1, alias="TABLE_STANDBY_REPLICAS", ge=0)
     app_name: str = Field("stream_handler", alias="APP_NAME")
+    app_mode: AppMode = Field(AppMode.DEVELOPMENT, alias="APP_MODE")
     logger_name: str = Field("faust app", alias="LOGGER_NAME")
+    log_format: LogFormat = Field(LogFormat.COLOR, alias="LOG_FORMAT")
+    log_summary_interval_sec: float = Field(
+        1.0, alias="LOG_SUMMARY_INTERVAL_SEC", gt=0
+    )
+    log_sample_every: int = Field(0, alias="LOG_SAMPLE_EVERY", ge=0)
     broker_address: str = Field(
         "localhost:9092,localhost:9093,localhost:9094", alias="BROKER_ADDRESS"
     )
+    censor_batch_size: int = Field(64, alias="CENSOR_BATCH_SIZE", ge=1)
+    censor_batch_linger_sec: float = Field(
+        0.05, alias="CENSOR_BATCH_LINGER_SEC", gt=0
+    )
+    censor_executor: CensorExecutor = Field(
+        CensorExecutor.LOOP, alias="CENSOR_EXECUTOR"
+    )
+    censor_pool_size: int = Field(2, alias="CENSOR_POOL_SIZE", ge=1)
+    censor_max_attempts: int = Field(5, alias="CENSOR_MAX_ATTEMPTS", ge=1)
+    censor_pipeline: CensorPipeline = Field(
+        CensorPipeline.TOPIC, alias="CENSOR_PIPELINE"
+    )
+    # NOTE: не меньше размера пакета, иначе полный пакет никогда не пройдет
+    admission_max_in_flight: int = Field(
+        10000, alias="ADMISSION_MAX_IN_FLIGHT", ge=MESSAGES_BATCH_MAX_SIZE
+    )
+    admission_retry_after_sec: float = Field(
+        1.0, alias="ADMISSION_RETRY_AFTER_SEC", gt=0
+    )
+    inbox_compression: InboxCompression = Field(
+        InboxCompression.NONE, alias="INBOX_COMPRESSION"
+    )
+    inbox_zstd_dictionary: str | None = Field(None, alias="INBOX_ZSTD_DICTIONARY")
+    inbox_zstd_min_text_bytes: int = Field(
+        32, alias="INBOX_ZSTD_MIN_TEXT_BYTES", ge=0
+    )
+    canonical_url: str | None = Field(None, alias="CANONICAL_URL")
+    route_cache_ttl_sec: float = Field(1.0, alias="ROUTE_CACHE_TTL_SEC", ge=0)
+    route_cache_max_size: int = Field(10000, alias="ROUTE_CACHE_MAX_SIZE", ge=1)
+    route_forward_timeout_sec: float = Field(
+        5.0, alias="ROUTE_FORWARD_TIMEOUT_SEC", gt=0
+    )
+    response_cache_max_size: int = Field(
+        10000, alias="RESPONSE_CACHE_MAX_SIZE", ge=1
+    )
+    # NOTE: без токена страницы /debug/ не регистрируются
+    debug_token: str | None = Field(None, alias="DEBUG_TOKEN")
+    debug_max_seconds: float = Field(60.0, alias="DEBUG_MAX_SECONDS", gt=0)
+    stats_recent_texts: int = Field(5, alias="STATS_RECENT_TEXTS", ge=0)
+    censor_stats_flush_interval_sec: float = Field(
+        10.0, alias="CENSOR_STATS_FLUSH_INTERVAL_SEC", gt=0
+    )
+    messages_serializer: Serializer = Field(
+        Serializer.ORJSON, alias="MESSAGES_SERIALIZER"
+    )
+    filtered_messages_serializer: Serializer = Field(
+        Serializer.ORJSON, alias="FILTERED_MESSAGES_SERIALIZER"
+    )
+    blocked_users_serializer: Serializer = Field(
+        Serializer.ORJSON, alias="BLOCKED_USERS_SERIALIZER"
+    )
+    banned_words_serializer: Serializer = Field(
+        Serializer.ORJSON, alias="BANNED_WORDS_SERIALIZER"
+    )
+    censor_stats_serializer: Serializer = Field(
+        Serializer.ORJSON, alias="CENSOR_STATS_SERIALIZER"
+    )
+
+    @field_validator("messages_serializer")
+    @classmethod
+    def validate_messages_serializer(cls, v: Serializer) -> Serializer:
+        """
+        Топик messages читает ksqlDB (VALUE_FORMAT='JSON'), поэтому кодек
+        должен выдавать JSON.
+        """
+        if v == Serializer.MSGPACK:
+            raise ValueError("messages topic is read by ksqlDB and must stay JSON")
+        return v
 
 
 settings = AppSettings()
@@ -4,11 +4,27 @@ BADWORD: Final[str] = "badword"
 FORBIDDENWORD: Final[str] = "forbiddenword"
 DEFAULT_BANNED_WORDS: Final[set[str]] = {BADWORD, FORBIDDENWORD}
 DEFAULT_CHAR_MASK: Final[str] = "*"
+BANNED_WORDS_KEY: Final[str] = "global"
+BANNED_WORDS_VERSION_KEY: Final[str] = "version"
 
 MIN_MOCK_USER_ID: Final[int] = 1
 MAX_MOCK_USER_ID: Final[int] = 10
 USER_MESSAGE_MAX_LENGTH: Final[int] = 150
+MESSAGES_BATCH_MAX_SIZE: Final[int] = 5000
 BLOCK_USER_COMMENT_MAX_LENGTH: Final[int] = 10
 MOCK_MESSAGES_TIMEOUT: Final[int] = 2
 
 DAY_SECONDS: Final[int] = 24 * 60 * 60
+
+# NOTE: 2**10 регистров HyperLogLog на отправителя, ошибка оценки около 3%
+HLL_PRECISION: Final[int] = 10
+
+# NOTE: count-min sketch 4 x 2048 счетчиков - погрешность частоты не больше
+# 0.13% от числа срабатываний за интервал выгрузки с вероятностью 98%
+COUNT_MIN_WIDTH: Final[int] = 2048
+COUNT_MIN_DEPTH: Final[int] = 4
+HEAVY_HITTERS_K: Final[int] = 20
+CENSOR_STATS_WORDS_KEY: Final[str] = "words"
+CENSOR_STATS_SENDERS_KEY: Final[str] = "senders"
+# NOTE: ключ счетчика слияний в таблице censor_stats_versions
+CENSOR_STATS_VERSION_KEY: Final[str] = "version"
@@ -1,4 +1,11 @@
+import asyncio
+import atexit
+import json
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from .types import LogFormat
 
 
 class Color:
@@ -16,46 +23,154 @@ class Color:
 SUCCESS = 25
 logging.addLevelName(SUCCESS, "SUCCESS")
 
+LEVEL_COLORS: dict[int, str] = {
+    logging.INFO: Color.LIGHT_CYAN,
+    logging.WARNING: Color.YELLOW,
+    logging.ERROR: Color.RED,
+}
+
+
+class EventSampler:
+    """
+    Агрегация частых однотипных событий в сводные записи лога.
+
+    Вместо строки на каждое событие раз в interval секунд пишется одна
+    запись вида "N messages censored in the last 1.0s". Дополнительно
+    каждое sample_every-е событие пишется в лог целиком (0 - не писать).
+    """
+
+    def __init__(
+        self, logger: logging.Logger, interval: float, sample_every: int = 0
+    ) -> None:
+        self.logger = logger
+        self.interval = interval
+        self.sample_every = sample_every
+        self._counters: dict[str, int] = {}
+        self._levels: dict[str, int] = {}
+        self._flush_scheduled: bool = False
+
+    def hit(self, level: int, event: str) -> bool:
+        """
+        Учет события.
+
+        :param level: int, уровень сводной записи
+        :param event: str, описание события во множественном числе
+
+        :return: bool, нужно ли записать это событие в лог целиком
+        """
+        count = self._counters.get(event, 0) + 1
+        self._counters[event] = count
+        self._levels[event] = level
+        if not self._flush_scheduled:
+            self._schedule_flush()
+        return bool(self.sample_every) and (count - 1) % self.sample_every == 0
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_scheduled = True
+        loop.call_later(self.interval, self.flush)
+
+    def flush(self) -> None:
+        """
+        Запись накопленных сводных записей в лог.
+        """
+        self._flush_scheduled = False
+        counters, self._counters = self._counters, {}
+        for event, count in counters.items():
+            self.logger.log(
+                self._levels[event],
+                "%d %s in the last %.1fs",
+                count,
+                event,
+                self.interval,
+            )
+
 
 class SchedulerLogger(logging.Logger):
     """
     Класс-логгер для приложения.
     """
 
+    sampler: EventSampler | None = None
+
     def success(self, message: str, *args, **kws) -> None:
         """
         Вариант для логгера в случае успешного завершения операции.
         """
         self._log(SUCCESS, message, args, **kws)
 
+    def sampled(self, level: int, event: str, message: str, *args, **kws) -> None:
+        """
+        Запись частого события через агрегатор.
+
+        :param level: int, уровень записи
+        :param event: str, описание события для сводной записи,
+            например "messages censored"
+        :param message: str, подробная запись о событии
+        """
+        if not self.isEnabledFor(level):
+            return
+        if self.sampler is None or self.sampler.hit(level, event):
+            self._log(level, message, args, **kws)
+
 
 class ColoredFormatter(logging.Formatter):
     def format(self, record) -> str:
         """
         Форматирование сообщение различными цветами.
         """
-        match record.levelno:
-            case logging.INFO:
-                record.msg = f"{Color.LIGHT_CYAN}{record.msg}{Color.RESET}"
-            case logging.WARNING:
-                record.msg = f"{Color.YELLOW}{record.msg}{Color.RESET}"
-            case logging.ERROR:
-                record.msg = f"{Color.RED}{record.msg}{Color.RESET}"
-            case _:
-                record.msg = f"{Color.GREEN}{record.msg}{Color.RESET}"
-        return super().format(record)
+        color = LEVEL_COLORS.get(record.levelno, Color.GREEN)
+        return f"{color}{super().format(record)}{Color.RESET}"
 
 
-def setup_logger(name="root", level=logging.INFO) -> logging.Logger:
+class JsonFormatter(logging.Formatter):
+    def format(self, record) -> str:
+        """
+        Форматирование записи в одну строку JSON без цветов.
+        """
+        entry = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logger(
+    name="root",
+    level=logging.INFO,
+    log_format: LogFormat = LogFormat.COLOR,
+    summary_interval: float = 1.0,
+    sample_every: int = 0,
+) -> logging.Logger:
     """
     Настройка логгера.
+
+    Запись в лог из event loop только кладет запись в очередь; форматирование
+    и вывод в терминал выполняются в отдельном потоке QueueListener.
     """
 
     handler = logging.StreamHandler()
-    handler.setFormatter(
-        ColoredFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    )
+    if log_format == LogFormat.JSON:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            ColoredFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
     logger = SchedulerLogger(name)
     logger.setLevel(level)
-    logger.addHandler(handler)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.sampler = EventSampler(logger, summary_interval, sample_every)
     return logger
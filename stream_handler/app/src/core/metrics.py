@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from typing import Final, Iterator
+
+import faust
+
+from .startup import StartupTimeline
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS: Final[tuple[float, ...]] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+def escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: tuple[str, ...], values: LabelValues, **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{n}="{escape_label(v)}"' for n, v in pairs) + "}"
+
+
+class Counter:
+    """
+    Монотонный счетчик Prometheus.
+    """
+
+    kind: str = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for label_values, value in self._values.items():
+            yield f"{self.name}{format_labels(self.labels, label_values)} {value}"
+
+
+class Histogram:
+    """
+    Гистограмма Prometheus с фиксированными границами корзин.
+
+    Наблюдение стоит одного bisect и двух сложений.
+    """
+
+    kind: str = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # NOTE: counts[i] - количество наблюдений в корзине i (без накопления),
+        # последняя корзина - +Inf
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        counts = self._counts.get(label_values)
+        if counts is None:
+            counts = self._counts[label_values] = [0] * (len(self.buckets) + 1)
+            self._sums[label_values] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[label_values] += value
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def samples(self) -> Iterator[str]:
+        for label_values, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                labels = format_labels(self.labels, label_values, le=str(bound))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {self._sums[label_values]}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Gauge:
+    """
+    Показатель Prometheus, значения которого вычисляются в момент запроса.
+    """
+
+    kind: str = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...],
+        collect: Callable[[], Iterable[tuple[LabelValues, float]]],
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+
+    def samples(self) -> Iterator[str]:
+        for label_values, value in self.collect():
+            yield f"{self.name}{format_labels(self.labels, label_values)} {value}"
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик приложения с выводом в текстовом формате Prometheus.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram | Gauge] = {}
+
+    def register(
+        self, metric: Counter | Histogram | Gauge
+    ) -> Counter | Histogram | Gauge:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+AGENT_EVENTS: Final[Counter] = METRICS.register(
+    Counter("agent_events_total", "Events processed by agent", ("agent",))
+)
+AGENT_LATENCY: Final[Histogram] = METRICS.register(
+    Histogram(
+        "agent_processing_seconds",
+        "Processing time of one event or batch by agent",
+        ("agent",),
+    )
+)
+CENSOR_MESSAGES: Final[Counter] = METRICS.register(
+    Counter("censor_messages_total", "Messages checked by the censor")
+)
+CENSOR_HITS: Final[Counter] = METRICS.register(
+    Counter("censor_hits_total", "Messages changed by the censor")
+)
+CENSOR_SECONDS: Final[Histogram] = METRICS.register(
+    Histogram("censor_seconds", "Time spent censoring one batch of texts")
+)
+AUTOMATON_REBUILDS: Final[Histogram] = METRICS.register(
+    Histogram(
+        "censor_automaton_rebuild_seconds",
+        "Time spent building the Aho-Corasick automaton",
+    )
+)
+ADMISSION_ADMITTED: Final[Counter] = METRICS.register(
+    Counter(
+        "admission_admitted_total",
+        "Write requests admitted by the in-flight budget",
+        ("endpoint",),
+    )
+)
+ADMISSION_REJECTED: Final[Counter] = METRICS.register(
+    Counter(
+        "admission_rejected_total",
+        "Write requests rejected with 429 by the in-flight budget",
+        ("endpoint",),
+    )
+)
+KEY_ROUTE_READS: Final[Counter] = METRICS.register(
+    Counter(
+        "key_route_reads_total",
+        "Per-key reads by source: local, standby, owner, cache or unavailable",
+        ("view", "source"),
+    )
+)
+HTTP_LATENCY: Final[Histogram] = METRICS.register(
+    Histogram(
+        "http_request_seconds",
+        "HTTP handler latency",
+        ("view", "method", "status"),
+    )
+)
+
+
+def table_key_count(table: faust.Table) -> int:
+    """
+    Количество ключей таблицы без полного обхода хранилища.
+
+    Для RocksDB используется оценка rocksdb.estimate-num-keys по каждой
+    партиции, для хранилища в памяти - размер словаря.
+
+    :param table: faust.Table, таблица (в том числе оконная)
+
+    :return: int, количество ключей
+    """
+    store = getattr(table, "table", table).data
+    dbs = getattr(store, "_dbs", None)
+    if dbs is not None:
+        return sum(
+            db.property_int_value("rocksdb.estimate-num-keys") or 0
+            for db in dbs.values()
+        )
+    return len(store.data)
+
+
+class MetricsSensor(faust.Sensor):
+    """
+    Сенсор faust для учета задержки HTTP-обработчиков.
+    """
+
+    def on_web_request_start(self, app, request, *, view=None) -> dict:
+        return {"time_start": time.perf_counter()}
+
+    def on_web_request_end(self, app, request, response, state, *, view=None) -> None:
+        HTTP_LATENCY.observe(
+            time.perf_counter() - state["time_start"],
+            type(view).__name__ if view is not None else "",
+            request.method,
+            str(response.status) if response is not None else "error",
+        )
+
+
+class StartupSensor(faust.Sensor):
+    """
+    Сенсор faust, отмечающий первое обработанное агентом событие.
+
+    После отметки сенсор удаляет себя, поэтому дальнейшие события
+    его не вызывают.
+    """
+
+    def __init__(
+        self, timeline: StartupTimeline, logger: logging.Logger, **kwargs
+    ) -> None:
+        super().__init__(**kwargs)
+        self.timeline = timeline
+        self.logger = logger
+
+    def on_stream_event_out(self, tp, offset, stream, event, state=None) -> None:
+        if "first_message" in self.timeline.phases:
+            return
+        self.timeline.mark("first_message")
+        self.logger.info("Startup timeline: %s", self.timeline.format())
+        # NOTE: удаление после текущего обхода сенсоров
+        asyncio.get_running_loop().call_soon(stream.app.sensors.remove, self)
@@ -14,6 +14,61 @@ class OperationType(StrEnum):
     REMOVE = "remove"
 
 
+class AppMode(StrEnum):
+    """
+    Режим запуска приложения.
+    """
+
+    DEVELOPMENT = "development"  # NOTE: с генератором случайных сообщений
+    PRODUCTION = "production"
+
+
+class CensorExecutor(StrEnum):
+    """
+    Режим выполнения цензуры сообщений.
+    """
+
+    LOOP = "loop"
+    PROCESS = "process"
+
+
+class CensorPipeline(StrEnum):
+    """
+    Путь сообщения от цензуры до таблицы входящих.
+    """
+
+    TOPIC = "topic"  # NOTE: через топик filtered_messages
+    FUSED = "fused"  # NOTE: цензура и сохранение в одном агенте
+
+
+class InboxCompression(StrEnum):
+    """
+    Сжатие текста сообщений во входящих.
+    """
+
+    NONE = "none"
+    ZSTD = "zstd"
+
+
+class Serializer(StrEnum):
+    """
+    Кодек значений топика.
+    """
+
+    JSON = "json"
+    ORJSON = "orjson"
+    MSGPACK = "msgpack"
+
+
+class LogFormat(StrEnum):
+    """
+    Формат вывода логов.
+    """
+
+    COLOR = "color"
+    JSON = "json"
+
+
 class SerializationError(TypedDict):
     """
     Ошибка сериализации запроса.
@@ -31,14 +86,16 @@ class SerializationError(TypedDict):
     input: Any
 
 
-class Message(faust.Record, serializer="json"):
+# NOTE: кодек записей не фиксируется в модели, иначе он имеет приоритет над
+# value_serializer топика; кодеки топиков задаются в настройках приложения
+class Message(faust.Record):
     sender_id: str
     recipient_id: str
     text: str
     timestamp: int
 
 
-class UserBlockingRecord(faust.Record, serializer="json"):
+class UserBlockingRecord(faust.Record):
     user_id: str
     blocked_id: str
     date_blocked: str  # NOTE: UTC ISO format
@@ -46,11 +103,21 @@ class UserBlockingRecord(faust.Record, serializer="json"):
     comment: str | None = None
 
 
-class BannedWord(faust.Record, serializer="json"):
+class BannedWord(faust.Record):
     word: str
     operation_type: OperationType
 
 
+class SenderStats(faust.Record):
+    messages_sent: int
+    recipients_sketch: str  # NOTE: регистры HyperLogLog в base64
+    recent_texts: list[str]
+
+
+class CensorHitsSnapshot(faust.Record):
+    counts: dict[str, int]  # NOTE: слово или отправитель -> количество срабатываний
+
+
 @dataclass
 class AppTables:
     """
@@ -59,7 +126,14 @@ class AppTables:
 
     banned_words: faust.Table
     blocked_users: faust.Table
+    blocked_users_versions: faust.Table
+    blocked_users_changes: faust.Table
     messages_filtered: faust.Table
+    messages_filtered_heads: faust.Table
+    sender_stats: faust.Table
+    sender_stats_totals: faust.Table
+    censor_stats: faust.Table
+    censor_stats_versions: faust.Table
 
 
 @dataclass(slots=True)
@@ -70,5 +144,7 @@ class AppTopics:
 
     messages_raw: faust.Topic
     messages_filtered: faust.Topic
+    messages_dead_letter: faust.Topic
     blocked_users: faust.Topic
     banned_words: faust.Topic
+    censor_stats: faust.Topic
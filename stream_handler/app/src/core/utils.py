@@ -1,5 +1,10 @@
+import base64
+import binascii
+
+import faust
 from pydantic import ValidationError as PydanticError
 
+from .const import BANNED_WORDS_VERSION_KEY
 from .types import SerializationError
 
 
@@ -16,3 +21,107 @@ def get_serializer_errors(e: PydanticError) -> list[SerializationError]:
         }
         for err in e.errors()
     ]
+
+
+def banned_words_version(table: faust.Table) -> int:
+    """
+    Версия словаря запрещенных слов.
+
+    Table.get проходит через default таблицы (множество слов по умолчанию),
+    поэтому наличие ключа проверяется явно.
+
+    :param table: faust.Table, таблица запрещенных слов
+
+    :return: int, версия словаря; 0 - словарь еще не менялся
+    """
+    if BANNED_WORDS_VERSION_KEY not in table:
+        return 0
+    return table[BANNED_WORDS_VERSION_KEY]
+
+
+def inbox_entry_key(recipient_id: str, sequence: int) -> str:
+    """
+    Ключ записи сообщения во входящих получателя.
+
+    :param recipient_id: str, идентификатор получателя
+    :param sequence: int, порядковый номер сообщения за окно
+
+    :return: str, ключ записи в таблице фильтрованных сообщений
+    """
+    return f"{recipient_id}:{sequence}"
+
+
+def sender_stats_totals_key(partition: int, name: str) -> str:
+    """
+    Ключ суточного итога статистики отправителей для одной партиции.
+
+    Итоги ведутся по партициям: каждую партицию обновляет только ее
+    владелец, а сумма по партициям дает итог без обхода отправителей.
+
+    :param partition: int, партиция потока статистики
+    :param name: str, имя итога ("messages" или "senders")
+
+    :return: str, ключ в таблице sender_stats_totals
+    """
+    return f"{partition}:{name}"
+
+
+def encode_cursor(*parts: float) -> str:
+    """
+    Непрозрачный курсор для постраничного чтения.
+
+    :param parts: float, неотрицательные целые составляющие позиции
+        (например, начало окна и порядковый номер сообщения)
+
+    :return: str, курсор в формате base64url
+    """
+    raw = ":".join(str(int(part)) for part in parts).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[int, ...]:
+    """
+    Разбор курсора, полученного от encode_cursor.
+
+    :param cursor: str, курсор из запроса клиента
+    :param size: int, ожидаемое количество составляющих курсора
+
+    :raises ValueError: курсор поврежден
+
+    :return: tuple[int, ...], составляющие позиции
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        parts = tuple(int(part) for part in raw.split(":"))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
+    if len(parts) != size or any(part < 0 for part in parts):
+        raise ValueError(f"invalid cursor: {cursor}")
+    return parts
+
+
+def encode_key_cursor(key: str) -> str:
+    """
+    Непрозрачный курсор для постраничного обхода таблицы по ключам.
+
+    :param key: str, последний ключ, возвращенный на странице
+
+    :return: str, курсор в формате base64url
+    """
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_key_cursor(cursor: str) -> str:
+    """
+    Разбор курсора, полученного от encode_key_cursor.
+
+    :param cursor: str, курсор из запроса клиента
+
+    :raises ValueError: курсор поврежден
+
+    :return: str, последний ключ предыдущей страницы
+    """
+    try:
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"invalid cursor: {cursor}") from e
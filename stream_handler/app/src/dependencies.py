@@ -1,9 +1,16 @@
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import faust
 
 from .core.types import AppTables, AppTopics
+from .core.config import settings
+from .services.admission import AdmissionControl
+from .services.blocking import BlockedPairsIndex, UserIdsIndex
+from .services.conditional import VersionedResponseCache
+from .services.inbox import InboxCodec
+from .services.routing import KeyRouter, ResponseCache
+from .services.sketches import HeavyHitters
 
 
 @dataclass(slots=True)
@@ -16,6 +23,31 @@ class AppDependencies:
     tables: AppTables | None = None
     topics: AppTopics | None = None
     logger: logging.Logger | None = None
+    blocked_pairs: BlockedPairsIndex = field(default_factory=BlockedPairsIndex)
+    user_ids: UserIdsIndex = field(default_factory=UserIdsIndex)
+    censored_words: HeavyHitters = field(default_factory=HeavyHitters)
+    censored_senders: HeavyHitters = field(default_factory=HeavyHitters)
+    admission: AdmissionControl = field(
+        default_factory=lambda: AdmissionControl(
+            settings.admission_max_in_flight, settings.admission_retry_after_sec
+        )
+    )
+    inbox_codec: InboxCodec = field(
+        default_factory=lambda: InboxCodec(
+            settings.inbox_compression,
+            settings.inbox_zstd_dictionary,
+            settings.inbox_zstd_min_text_bytes,
+        )
+    )
+    response_cache: VersionedResponseCache = field(
+        default_factory=lambda: VersionedResponseCache(settings.response_cache_max_size)
+    )
+    key_router: KeyRouter = field(
+        default_factory=lambda: KeyRouter(
+            ResponseCache(settings.route_cache_ttl_sec, settings.route_cache_max_size),
+            settings.route_forward_timeout_sec,
+        )
+    )
 
 
 DEPENDENCIES = AppDependencies()
@@ -0,0 +1,53 @@
+import random
+
+import faust
+from faker import Faker
+
+from .core.const import (
+    BADWORD,
+    FORBIDDENWORD,
+    MAX_MOCK_USER_ID,
+    MIN_MOCK_USER_ID,
+    MOCK_MESSAGES_TIMEOUT,
+)
+from .core.types import Message
+from .dependencies import AppDependencies
+
+
+def mock_messages(app: faust.App, dependencies: AppDependencies) -> None:
+    """
+    Регистрация генератора случайных сообщений для режима разработки.
+
+    Модуль импортируется только при APP_MODE=development, поэтому в
+    рабочем режиме Faker не загружается и таймер не регистрируется.
+    """
+    fake = Faker()
+
+    @app.timer(interval=MOCK_MESSAGES_TIMEOUT)
+    async def periodic_message_sender() -> None:
+        """
+        Периодически отправляет рандомные сообщения в топик сырых сообщений.
+        """
+        sender_id: str = str(random.randint(MIN_MOCK_USER_ID, MAX_MOCK_USER_ID))
+        recipient_id: str = str(random.randint(MIN_MOCK_USER_ID, MAX_MOCK_USER_ID))
+        if sender_id == recipient_id:
+            return
+        text: str = random.choice(
+            (
+                fake.sentence(),
+                fake.text(max_nb_chars=50),
+                fake.catch_phrase(),
+                f"{fake.word()} is a {BADWORD}",
+                f"{fake.word()} is a {FORBIDDENWORD}",
+            )
+        )
+        # NOTE: сообщения от заблокированных отправителей отбрасывает censor_agent
+        await dependencies.topics.messages_raw.send(
+            key=recipient_id,
+            value=Message(
+                sender_id=sender_id,
+                recipient_id=recipient_id,
+                text=text,
+                timestamp=int(fake.unix_time()),
+            ),
+        )
@@ -0,0 +1,96 @@
+import asyncio
+import math
+from typing import Any
+
+import faust
+
+from ..core.metrics import ADMISSION_ADMITTED, ADMISSION_REJECTED
+
+
+class Reservation:
+    """
+    Единицы бюджета, зарезервированные одним запросом.
+
+    Каждая отправка через send() расходует одну единицу, которая вернется
+    в бюджет после подтверждения брокера. Неизрасходованные единицы
+    возвращаются при выходе из контекста, в том числе при ошибке или отмене
+    запроса.
+    """
+
+    __slots__ = ("admission", "remaining")
+
+    def __init__(self, admission: "AdmissionControl", amount: int) -> None:
+        self.admission = admission
+        self.remaining: int = amount
+
+    def __enter__(self) -> "Reservation":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.admission.release(self.remaining)
+        self.remaining = 0
+
+    async def send(self, topic: faust.Topic, **kwargs: Any) -> asyncio.Future:
+        """
+        Отправка записи в счет зарезервированной единицы.
+
+        :param topic: faust.Topic, топик
+        :param kwargs: аргументы faust.Topic.send
+
+        :return: asyncio.Future, подтверждение брокера
+        """
+        fut = await topic.send(**kwargs)
+        self.remaining -= 1
+        fut.add_done_callback(lambda _: self.admission.release())
+        return fut
+
+
+class AdmissionControl:
+    """
+    Общий бюджет неподтвержденных брокером отправок из HTTP API.
+
+    Запрос резервирует столько единиц бюджета, сколько записей собирается
+    отправить; единица освобождается, когда брокер подтвердит запись или
+    отправка завершится ошибкой. Если бюджета не хватает, запрос отклоняется
+    сразу, а не ждет в очереди продюсера.
+    """
+
+    __slots__ = ("limit", "retry_after", "in_flight")
+
+    def __init__(self, limit: int, retry_after: float) -> None:
+        self.limit: int = limit
+        self.retry_after: float = retry_after
+        self.in_flight: int = 0
+
+    def reserve(self, amount: int, endpoint: str) -> Reservation | None:
+        """
+        Резервирование единиц бюджета.
+
+        :param amount: int, количество записей к отправке
+        :param endpoint: str, имя эндпоинта для метрик
+
+        :return: Reservation | None, резерв или None, если запрос отклонен
+        """
+        if self.in_flight + amount > self.limit:
+            ADMISSION_REJECTED.inc(1, endpoint)
+            return None
+        self.in_flight += amount
+        ADMISSION_ADMITTED.inc(1, endpoint)
+        return Reservation(self, amount)
+
+    def release(self, amount: int = 1) -> None:
+        """
+        Возврат единиц бюджета.
+
+        :param amount: int, количество единиц
+
+        :return: None
+        """
+        self.in_flight -= amount
+
+    @property
+    def retry_headers(self) -> dict[str, str]:
+        """
+        Заголовки ответа 429.
+        """
+        return {"Retry-After": str(math.ceil(self.retry_after))}
@@ -0,0 +1,129 @@
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Final, TypeAlias
+
+from sortedcontainers import SortedSet
+
+PairKey: TypeAlias = int | tuple[str, str]
+
+SENDER_ID_BITS: Final[int] = 64
+
+
+def pack_pair(recipient_id: str, sender_id: str) -> PairKey:
+    """
+    Упаковка пары (получатель, отправитель) в одно целое число.
+
+    Идентификаторы, которые не помещаются в упаковку (не числа или отрицательные),
+    остаются кортежем строк - такие пары тоже ищутся за O(1).
+
+    :param recipient_id: str, идентификатор получателя (блокирующего)
+    :param sender_id: str, идентификатор отправителя (заблокированного)
+
+    :return: PairKey, ключ пары для индекса
+    """
+    try:
+        recipient, sender = int(recipient_id), int(sender_id)
+    except ValueError:
+        return (recipient_id, sender_id)
+    if recipient < 0 or not 0 <= sender < 1 << SENDER_ID_BITS:
+        return (recipient_id, sender_id)
+    return (recipient << SENDER_ID_BITS) | sender
+
+
+class BlockedPairsIndex:
+    """
+    Индекс заблокированных пар для горячего пути проверки сообщений.
+
+    Хранит только факт блокировки в виде одного множества упакованных целых
+    чисел, без комментариев и дат блокировки, которые остаются в таблице
+    blocked_users. Индекс локален для воркера и строится по его партициям.
+    """
+
+    __slots__ = ("_pairs",)
+
+    def __init__(self) -> None:
+        self._pairs: set[PairKey] = set()
+
+    def __len__(self) -> int:
+        return len(self._pairs)
+
+    def add(self, recipient_id: str, sender_id: str) -> None:
+        self._pairs.add(pack_pair(recipient_id, sender_id))
+
+    def discard(self, recipient_id: str, sender_id: str) -> None:
+        self._pairs.discard(pack_pair(recipient_id, sender_id))
+
+    def is_blocked(self, recipient_id: str, sender_id: str) -> bool:
+        """
+        Проверка, заблокирован ли отправитель получателем.
+
+        :param recipient_id: str, идентификатор получателя
+        :param sender_id: str, идентификатор отправителя
+
+        :return: bool, True если отправитель заблокирован
+        """
+        return pack_pair(recipient_id, sender_id) in self._pairs
+
+    def rebuild(self, blocked_users: Iterable[tuple[str, Mapping]]) -> None:
+        """
+        Полная перестройка индекса по записям таблицы blocked_users.
+
+        :param blocked_users: Iterable[tuple[str, Mapping]], пары
+            (идентификатор пользователя, заблокированные им пользователи)
+
+        :return: None
+        """
+        self._pairs = {
+            pack_pair(user_id, blocked_id)
+            for user_id, blocked in blocked_users
+            for blocked_id in blocked or ()
+        }
+
+
+class UserIdsIndex:
+    """
+    Упорядоченные идентификаторы пользователей таблицы blocked_users.
+
+    Нужен для постраничного обхода по курсору: хранилища faust не дают
+    упорядоченного обхода ключей с произвольного места через публичный API,
+    а сортировка всех ключей на каждой странице стоит O(n log n). Индекс
+    локален для воркера и, как BlockedPairsIndex, ведется агентом блокировок
+    и перестраивается после восстановления таблицы.
+    """
+
+    __slots__ = ("_user_ids",)
+
+    def __init__(self) -> None:
+        self._user_ids: SortedSet = SortedSet()
+
+    def __len__(self) -> int:
+        return len(self._user_ids)
+
+    def add(self, user_id: str) -> None:
+        self._user_ids.add(user_id)
+
+    def after(self, user_id: str | None) -> Iterator[str]:
+        """
+        Идентификаторы по возрастанию, начиная со следующего за user_id.
+
+        Поиск начала - O(log n). Индекс нельзя изменять во время обхода,
+        поэтому между чтениями с передачей управления event loop обход
+        начинается заново с последнего прочитанного идентификатора.
+
+        :param user_id: str | None, последний идентификатор предыдущей
+            страницы или None для первой страницы
+
+        :return: Iterator[str], идентификаторы пользователей
+        """
+        if user_id is None:
+            return iter(self._user_ids)
+        return self._user_ids.irange(minimum=user_id, inclusive=(False, True))
+
+    def rebuild(self, user_ids: Iterable[str]) -> None:
+        """
+        Полная перестройка индекса по ключам таблицы blocked_users.
+
+        :param user_ids: Iterable[str], идентификаторы пользователей
+
+        :return: None
+        """
+        self._user_ids = SortedSet(user_ids)
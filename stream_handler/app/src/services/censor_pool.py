@@ -0,0 +1,95 @@
+import asyncio
+import multiprocessing
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+from .censorship import _censor_instance
+
+
+def censor_in_worker(
+    texts: Sequence[str], version: int, banned_words: frozenset[str] | None
+) -> tuple[list[str], list[str]] | None:
+    """
+    Цензура пачки текстов внутри процесса пула.
+
+    Каждый процесс хранит собственный автомат. Если версия словаря в процессе
+    устарела, а слова не переданы, возвращается None, и вызывающая сторона
+    повторяет задачу вместе со словарем.
+
+    :param texts: Sequence[str], исходные тексты
+    :param version: int, актуальная версия словаря
+    :param banned_words: frozenset[str] | None, словарь запрещенных слов
+
+    :return: tuple[list[str], list[str]] | None, тексты с замаскированными
+        словами и найденные запрещенные слова
+    """
+    if _censor_instance.version != version:
+        if banned_words is None:
+            return None
+        _censor_instance.build_automaton(banned_words, version)
+    hits: list[str] = []
+    return _censor_instance.censor_many(texts, hits=hits), hits
+
+
+class CensorPool:
+    """
+    Пул процессов для цензуры сообщений вне event loop.
+
+    Процессы запускаются лениво при первой пачке. Словарь передается в процесс
+    только тогда, когда его версия там устарела.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size: int = size
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def censor_many(
+        self,
+        texts: Sequence[str],
+        banned_words: set[str],
+        version: int,
+        hits: list[str] | None = None,
+    ) -> list[str]:
+        """
+        Маскировка запрещенных слов в пачке текстов в одном из процессов пула.
+
+        :param texts: Sequence[str], исходные тексты
+        :param banned_words: set[str], множество запрещенных слов
+        :param version: int, версия словаря
+        :param hits: list[str] | None, список для найденных запрещенных слов
+
+        :return: list[str], тексты с замаскированными словами в исходном порядке
+        """
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self.executor, censor_in_worker, texts, version, None
+        )
+        if result is None:
+            result = await loop.run_in_executor(
+                self.executor,
+                censor_in_worker,
+                texts,
+                version,
+                frozenset(banned_words),
+            )
+        censored, found = result
+        if hits is not None:
+            hits.extend(found)
+        return censored
+
+    def shutdown(self) -> None:
+        """
+        Остановка процессов пула.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
@@ -1,89 +1,325 @@
+import asyncio
+import re
+from collections.abc import Iterable, Sequence
+from typing import Final
+
 import ahocorasick
 
 from ..core.const import DEFAULT_CHAR_MASK
+from ..core.metrics import AUTOMATON_REBUILDS
+from .normalization import normalize, normalize_with_offsets
+
+TEXTS_SEPARATOR: Final[str] = "\x00"
+# NOTE: разделители, которыми разбивают слово по буквам ("b a d", "b.a.d")
+SPACED_LETTERS_SEPARATORS: Final[tuple[str, ...]] = (" ", ".", "-", "_")
+SPACED_LETTERS_MIN_LENGTH: Final[int] = 4
+UNMASKED_CHARS_PATTERN: Final[re.Pattern] = re.compile(r"[^ \n\t]")
+
+Span = tuple[int, int]
+
+
+def merge_spans(spans: list[Span]) -> list[Span]:
+    """
+    Объединение пересекающихся и смежных интервалов.
+
+    :param spans: list[Span], интервалы [start, end) в произвольном порядке
+
+    :return: list[Span], отсортированные непересекающиеся интервалы
+    """
+    spans.sort()
+    merged: list[Span] = [spans[0]]
+    for start, end in spans[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end:
+            if end > last_end:
+                merged[-1] = (last_start, end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def mask_spans(text: str, spans: list[Span], mask_char: str) -> str:
+    """
+    Маскировка символов текста в заданных интервалах.
+
+    Текст собирается из срезов, пробельные символы внутри интервалов
+    сохраняются.
+
+    :param text: str, исходный текст
+    :param spans: list[Span], отсортированные непересекающиеся интервалы
+    :param mask_char: str, символ для маскировки
+
+    :return: str, текст с замаскированными интервалами
+    """
+    parts: list[str] = []
+    position = 0
+    for start, end in spans:
+        parts.append(text[position:start])
+        chunk = text[start:end]
+        if " " in chunk or "\n" in chunk or "\t" in chunk:
+            parts.append(UNMASKED_CHARS_PATTERN.sub(mask_char, chunk))
+        else:
+            parts.append(mask_char * (end - start))
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+def make_automaton(banned_words: Iterable[str]) -> ahocorasick.Automaton | None:
+    """
+    Строит автомат Aho-Corasick из списка запрещенных слов.
+
+    Слова нормализуются так же, как тексты. Для слов не короче
+    SPACED_LETTERS_MIN_LENGTH в автомат добавляются и написания по буквам
+    через разделитель, поэтому они не стоят ничего при сканировании.
+    Значение ключа - (длина ключа, слово словаря).
+
+    :param banned_words: Iterable[str], запрещенные слова
+
+    :return: ahocorasick.Automaton | None, готовый автомат или None,
+        если список слов пуст
+    """
+    with AUTOMATON_REBUILDS.time():
+        A = ahocorasick.Automaton()
+        for word in banned_words:
+            key = normalize(word).strip()
+            if not key:
+                continue
+            A.add_word(key, (len(key), word))
+            if len(key) >= SPACED_LETTERS_MIN_LENGTH and " " not in key:
+                for separator in SPACED_LETTERS_SEPARATORS:
+                    spaced = separator.join(key)
+                    A.add_word(spaced, (len(spaced), word))
+        if not len(A):
+            return None
+        A.make_automaton()
+        return A
 
 
 class WordCensor:
     """
     Класс для цензуры слов в тексте.
+
+    Автомат перестраивается только при смене версии словаря. Новый автомат
+    строится в пуле потоков, а до его готовности сообщения обрабатываются
+    текущим (двойная буферизация), поэтому цензура не блокируется на
+    make_automaton(). Синхронно автомат строится только при холодном старте,
+    когда активного автомата еще нет.
     """
 
     def __init__(self, mask_char: str | None = None) -> None:
         self._automaton: ahocorasick.Automaton | None = None
-        self._words_hash: int = 0
+        self._version: int | None = None
+        self._pending_version: int | None = None
         self.mask_char: str = mask_char or DEFAULT_CHAR_MASK
 
-    def build_automaton(self, banned_words: set[str]) -> None:
+    @property
+    def version(self) -> int | None:
+        """
+        Версия словаря, по которой построен активный автомат.
+        """
+        return self._version
+
+    def build_automaton(self, banned_words: set[str], version: int) -> None:
         """
-        Строит автомат Aho-Corasick из списка запрещенных слов.
+        Синхронная сборка автомата и его активация.
 
         :param banned_words: set[str], множество запрещенных слов
+        :param version: int, версия словаря
 
         :return: None
         """
-        if not banned_words:
-            self._automaton = None
-            self._words_hash = 0
-            return
+        self._swap(make_automaton(banned_words), version)
+
+    def refresh(self, banned_words: set[str], version: int) -> None:
+        """
+        Обновление автомата при смене версии словаря.
+
+        Сравнение версий выполняется за O(1); при совпадении с активной или
+        уже собираемой версией ничего не происходит.
+
+        :param banned_words: set[str], множество запрещенных слов
+        :param version: int, версия словаря
 
-        new_hash = hash(frozenset(banned_words))
-        if new_hash == self._words_hash and self._automaton is not None:
+        :return: None
+        """
+        if version in (self._version, self._pending_version):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None or self._version is None:
+            self.build_automaton(banned_words, version)
             return
 
-        A = ahocorasick.Automaton()
-        for word in banned_words:
-            if word:
-                A.add_word(word.lower(), word)
+        self._pending_version = version
+        rebuild = loop.run_in_executor(None, make_automaton, frozenset(banned_words))
+        rebuild.add_done_callback(
+            lambda fut: self._on_rebuilt(fut, version),
+        )
 
-        A.make_automaton()
-        self._automaton = A
-        self._words_hash = new_hash
+    def _on_rebuilt(self, fut: asyncio.Future, version: int) -> None:
+        """
+        Активация автомата, собранного в пуле потоков.
+        """
+        if self._pending_version == version:
+            self._pending_version = None
+        if fut.cancelled() or fut.exception() is not None:
+            return
+        if self._version is None or version > self._version:
+            self._swap(fut.result(), version)
 
-    def censor_text(
-        self, text: str, banned_words: set[str], mask_char: str | None
-    ) -> str:
+    def _swap(self, automaton: ahocorasick.Automaton | None, version: int) -> None:
+        self._automaton = automaton
+        self._version = version
+
+    def censor_text(self, text: str, mask_char: str | None = None) -> str:
         """
         Маскировка запрещенных слов в тексте.
 
         :param text: str, исходный текст
-        :param banned_words: set[str], множество запрещенных слов
         :param mask_char: str, символ для маскировки
 
         :return: str, текст с замаскированными словами
         """
-        if not text or not banned_words:
-            return text
+        return self.censor_many((text,), mask_char)[0]
 
-        self.build_automaton(banned_words)
-        if self._automaton is None:
-            return text
+    def censor_many(
+        self,
+        texts: Sequence[str],
+        mask_char: str | None = None,
+        hits: list[str] | None = None,
+    ) -> list[str]:
+        """
+        Маскировка запрещенных слов в пачке текстов.
+
+        Тексты склеиваются через разделитель, нормализуются одним вызовом
+        str.translate (регистр, полноширинные и похожие буквы, leetspeak,
+        невидимые символы) и сканируются автоматом за один проход.
+        Пересекающиеся совпадения объединяются в интервалы, и каждый
+        измененный текст собирается из срезов. Тексты без совпадений
+        возвращаются как есть, без копирования.
+
+        :param texts: Sequence[str], исходные тексты
+        :param mask_char: str, символ для маскировки
+        :param hits: list[str] | None, список, в который добавляется каждое
+            найденное запрещенное слово
+
+        :return: list[str], тексты с замаскированными словами в исходном порядке
+        """
+        automaton = self._automaton
+        result = list(texts)
+        if automaton is None or not result:
+            return result
+
+        joined = TEXTS_SEPARATOR.join(result)
+        normalized = normalize(joined)
+        if len(normalized) != len(joined):
+            # NOTE: нормализация удалила невидимые символы, смещения в общем
+            # буфере не совпадают с исходными, поэтому сканируем тексты
+            # по отдельности
+            if len(result) > 1:
+                return [
+                    self.censor_many((text,), mask_char, hits)[0] for text in result
+                ]
+            return [self._censor_unaligned(result[0], automaton, mask_char, hits)]
+
+        # NOTE: совпадения приходят по возрастанию конца, поэтому текущий текст
+        # определяется сдвигом указателя, а интервалы объединяются на лету
+        text_spans: dict[int, list[Span]] = {}
+        spans: list[Span] = []
+        index, offset, limit = 0, 0, len(result[0])
+        for end_index, (length, word) in automaton.iter(normalized):
+            end = end_index + 1
+            if end > limit:
+                if spans:
+                    text_spans[index] = spans
+                    spans = []
+                while end > limit:
+                    index += 1
+                    offset = limit + 1
+                    limit = offset + len(result[index])
+            start = end - length - offset
+            end -= offset
+            if hits is not None:
+                hits.append(word)
+            while spans and start <= spans[-1][1]:
+                start = min(start, spans.pop()[0])
+            spans.append((start, end))
+        if spans:
+            text_spans[index] = spans
 
         mask_char = mask_char or self.mask_char
-        result = list(text)
-        for end_index, original_word in self._automaton.iter(text.lower()):
-            start = end_index - len(original_word) + 1
-            for i in range(start, end_index + 1):
-                if result[i] not in (" ", "\n", "\t"):
-                    result[i] = mask_char
-        return "".join(result)
+        for index, spans in text_spans.items():
+            result[index] = mask_spans(result[index], spans, mask_char)
+        return result
+
+    def _censor_unaligned(
+        self,
+        text: str,
+        automaton: ahocorasick.Automaton,
+        mask_char: str | None,
+        hits: list[str] | None = None,
+    ) -> str:
+        """
+        Маскировка текста с невидимыми символами через карту смещений.
+        """
+        normalized, offsets = normalize_with_offsets(text)
+        matches = list(automaton.iter(normalized))
+        if not matches:
+            return text
+        if hits is not None:
+            hits.extend(word for _, (_, word) in matches)
+        spans = [
+            (offsets[end - length + 1], offsets[end] + 1)
+            for end, (length, _) in matches
+        ]
+        return mask_spans(text, merge_spans(spans), mask_char or self.mask_char)
 
 
 _censor_instance = WordCensor(mask_char=DEFAULT_CHAR_MASK)
 
 
-def censor_text(
-    text: str,
-    banned_words: set[str],
-    mask_char: str | None = None,
-) -> str:
+def refresh_vocabulary(banned_words: set[str], version: int) -> None:
+    """
+    Передача цензору актуального словаря запрещенных слов.
+
+    :param banned_words: set[str], множество запрещенных слов
+    :param version: int, версия словаря
+
+    :return: None
+    """
+    _censor_instance.refresh(banned_words, version)
+
+
+def censor_text(text: str, mask_char: str | None = None) -> str:
     """
     Маскировка запрещенных слов в тексте.
 
     :param text: str, исходный текст
-    :param banned_words: set[str], множество запрещенных слов
     :param mask_char: str | None, символ для маскировки запрещенных слов
         :default None, значение маски по-умолчанию
 
     :return: str, текст с замаскированными словами
     """
-    return _censor_instance.censor_text(text, banned_words, mask_char)
+    return _censor_instance.censor_text(text, mask_char)
+
+
+def censor_many(
+    texts: Sequence[str],
+    mask_char: str | None = None,
+    hits: list[str] | None = None,
+) -> list[str]:
+    """
+    Маскировка запрещенных слов в пачке текстов.
+
+    :param texts: Sequence[str], исходные тексты
+    :param mask_char: str | None, символ для маскировки запрещенных слов
+        :default None, значение маски по-умолчанию
+    :param hits: list[str] | None, список для найденных запрещенных слов
+        :default None, слова не собираются
+
+    :return: list[str], тексты с замаскированными словами в исходном порядке
+    """
+    return _censor_instance.censor_many(texts, mask_char, hits)
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from http import HTTPStatus
+
+import faust
+from aiohttp.web_request import Request
+from aiohttp.web_response import Response
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Сильный ETag из составляющих версии ответа.
+
+    :param parts: object, составляющие (имя ресурса, ключ, счетчик изменений)
+
+    :return: str, ETag в кавычках
+    """
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Совпадает ли ETag с одним из значений If-None-Match запроса.
+
+    :param request: Request, запрос
+    :param etag: str, текущий ETag ресурса
+
+    :return: bool, True - можно ответить 304
+    """
+    if not (header := request.headers.get("If-None-Match")):
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip().removeprefix("W/")
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+def not_modified_response(
+    view: faust.web.View, request: Request, etag: str
+) -> Response | None:
+    """
+    Ответ 304 для запроса с совпадающим If-None-Match.
+
+    :param view: faust.web.View, представление
+    :param request: Request, запрос
+    :param etag: str, текущий ETag ресурса
+
+    :return: Response | None, ответ 304 или None, если ответ нужно построить
+    """
+    if is_not_modified(request, etag):
+        return view.bytes(b"", status=HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+class VersionedResponseCache:
+    """
+    Сериализованные тела ответов, действительные до смены версии ключа.
+
+    Версия - счетчик изменений из таблицы, поэтому устаревшая запись
+    обнаруживается при первом же чтении после изменения. Хранит не более
+    max_size записей, при переполнении вытесняется давно не запрошенная.
+    """
+
+    __slots__ = ("max_size", "entries")
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.entries: OrderedDict[Hashable, tuple[int, bytes]] = OrderedDict()
+
+    def get_or_build(
+        self, key: Hashable, version: int, build: Callable[[], bytes]
+    ) -> bytes:
+        """
+        Тело ответа из кеша или построенное заново.
+
+        :param key: Hashable, ключ ресурса
+        :param version: int, текущая версия ресурса
+        :param build: Callable[[], bytes], сериализация ответа
+
+        :return: bytes, тело ответа
+        """
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.entries.move_to_end(key)
+            return entry[1]
+        body = build()
+        self.entries[key] = (version, body)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return body
@@ -0,0 +1,145 @@
+import asyncio
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import statistics
+from typing import Any, Final
+
+# NOTE: период проб задержки event loop; задержка пробы сверх периода и есть
+# время, на которое loop был занят
+LAG_PROBE_INTERVAL_SEC: Final[float] = 0.01
+SLOW_CALLBACKS_LIMIT: Final[int] = 50
+PROFILE_SORT_KEYS: Final[frozenset[str]] = frozenset(
+    {"cumulative", "tottime", "calls"}
+)
+
+
+class SlowCallbacksHandler(logging.Handler):
+    """
+    Сбор предупреждений asyncio о медленных обратных вызовах.
+
+    В режиме отладки loop пишет в логгер asyncio "Executing <handle> took
+    N seconds" для каждого вызова дольше loop.slow_callback_duration.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(logging.WARNING)
+        self.callbacks: list[tuple[float, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.msg.startswith("Executing ") and len(record.args) == 2:
+            handle, seconds = record.args
+            self.callbacks.append((seconds, str(handle)))
+
+
+async def profile_loop(seconds: float) -> cProfile.Profile:
+    """
+    Детерминированное профилирование потока event loop в течение seconds.
+
+    Профилировщик включается только на время запроса; в него попадают все
+    агенты, таймеры и обработчики, выполнявшиеся в loop за это время.
+
+    :param seconds: float, длительность профилирования
+
+    :return: cProfile.Profile, собранный профиль
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    return profiler
+
+
+def format_profile(profiler: cProfile.Profile, sort: str, limit: int) -> str:
+    """
+    Топ функций профиля в текстовом виде pstats.
+
+    :param profiler: cProfile.Profile, профиль
+    :param sort: str, ключ сортировки из PROFILE_SORT_KEYS
+    :param limit: int, количество функций
+
+    :return: str, отчет pstats
+    """
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def dump_profile(profiler: cProfile.Profile) -> bytes:
+    """
+    Профиль в формате файла pstats (как cProfile.Profile.dump_stats).
+
+    Файл открывается через python -m pstats, snakeviz или flameprof.
+
+    :param profiler: cProfile.Profile, профиль
+
+    :return: bytes, содержимое файла pstats
+    """
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+async def measure_loop(
+    seconds: float, slow_callback_sec: float | None
+) -> dict[str, Any]:
+    """
+    Задержка event loop и медленные обратные вызовы за seconds секунд.
+
+    Задержка измеряется пробами каждые LAG_PROBE_INTERVAL_SEC. Для поиска
+    медленных вызовов loop на время замера переводится в режим отладки
+    (он замедляет планирование задач), затем прежний режим возвращается.
+
+    :param seconds: float, длительность замера
+    :param slow_callback_sec: float | None, порог медленного вызова;
+        None - не искать медленные вызовы и не включать режим отладки
+
+    :return: dict[str, Any], количество проб, задержка в миллисекундах
+        (mean, p99, max) и самые долгие вызовы
+    """
+    loop = asyncio.get_running_loop()
+    asyncio_logger = logging.getLogger("asyncio")
+    handler = SlowCallbacksHandler()
+    debug, slow_callback_duration = loop.get_debug(), loop.slow_callback_duration
+    logger_level = asyncio_logger.level
+    if slow_callback_sec is not None:
+        asyncio_logger.addHandler(handler)
+        if not asyncio_logger.isEnabledFor(logging.WARNING):
+            asyncio_logger.setLevel(logging.WARNING)
+        loop.slow_callback_duration = slow_callback_sec
+        loop.set_debug(True)
+    lags: list[float] = []
+    try:
+        deadline = loop.time() + seconds
+        while loop.time() < deadline:
+            expected = loop.time() + LAG_PROBE_INTERVAL_SEC
+            await asyncio.sleep(LAG_PROBE_INTERVAL_SEC)
+            lags.append(max(loop.time() - expected, 0.0) * 1000)
+    finally:
+        if slow_callback_sec is not None:
+            loop.set_debug(debug)
+            loop.slow_callback_duration = slow_callback_duration
+            asyncio_logger.setLevel(logger_level)
+            asyncio_logger.removeHandler(handler)
+
+    slowest = sorted(handler.callbacks, reverse=True)[:SLOW_CALLBACKS_LIMIT]
+    return {
+        "samples": len(lags),
+        "lag_ms": {
+            "mean": statistics.fmean(lags) if lags else 0.0,
+            "p99": (
+                statistics.quantiles(lags, n=100, method="inclusive")[98]
+                if len(lags) > 1
+                else 0.0
+            ),
+            "max": max(lags, default=0.0),
+        },
+        "slow_callbacks_total": len(handler.callbacks),
+        "slow_callbacks": [
+            {"callback": callback, "seconds": duration}
+            for duration, callback in slowest
+        ],
+    }
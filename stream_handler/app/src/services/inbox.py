@@ -0,0 +1,197 @@
+import struct
+from functools import cache
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+import orjson
+
+from ..core.types import InboxCompression, Message
+
+# NOTE: флаги, время записи во входящие, время сообщения, длина sender_id;
+# далее sender_id и текст
+ENTRY_HEADER = struct.Struct("<BddH")
+# NOTE: заголовок записей без времени записи (без FLAG_APPENDED_AT)
+LEGACY_ENTRY_HEADER = struct.Struct("<BdH")
+FLAG_INT_SENDER = 0x01  # NOTE: sender_id - целое число little-endian
+FLAG_COMPRESSED = 0x02  # NOTE: текст сжат zstd
+FLAG_APPENDED_AT = 0x04  # NOTE: заголовок ENTRY_HEADER со временем записи
+# NOTE: записи в формате JSON (Message до перехода на компактный формат)
+# начинаются с "{", флаги компактной записи всегда меньше
+LEGACY_ENTRY_PREFIX = b"{"
+ZSTD_LEVEL = 3
+
+
+@cache
+def load_zstandard() -> ModuleType | None:
+    """
+    Загрузка zstandard при первом обращении.
+
+    zstandard нужен только при INBOX_COMPRESSION=zstd или для чтения записей,
+    сжатых до смены настройки, поэтому не импортируется при старте.
+
+    :return: ModuleType | None, модуль или None, если пакет не установлен
+    """
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def pack_user_id(user_id: str) -> tuple[int, bytes]:
+    """
+    Компактное представление идентификатора пользователя.
+
+    :param user_id: str, идентификатор
+
+    :return: tuple[int, bytes], флаг FLAG_INT_SENDER или 0 и байты
+        идентификатора: целое число для десятичных id без ведущих нулей,
+        иначе UTF-8
+    """
+    if user_id.isascii() and user_id.isdigit() and str(int(user_id)) == user_id:
+        number = int(user_id)
+        return FLAG_INT_SENDER, number.to_bytes(
+            max(1, (number.bit_length() + 7) // 8), "little"
+        )
+    return 0, user_id.encode()
+
+
+class InboxCodec:
+    """
+    Кодек записей входящих в таблице messages_filtered.
+
+    Запись - одна строка байт: заголовок (флаги, время записи во входящие и
+    время сообщения), sender_id (целым числом, если это возможно) и текст
+    в UTF-8, при INBOX_COMPRESSION=zstd - сжатый, если он не короче
+    min_text_bytes. recipient_id не хранится, он есть в ключе
+    записи. В Message запись превращается только при ответе API.
+
+    Словарь zstd (dictionary_path) должен быть общим для всех воркеров:
+    записи, сжатые со словарем, читаются только с ним же.
+    """
+
+    __slots__ = ("compressor", "decompressor", "dictionary_path", "min_text_bytes")
+
+    def __init__(
+        self,
+        compression: InboxCompression = InboxCompression.NONE,
+        dictionary_path: str | None = None,
+        min_text_bytes: int = 0,
+    ) -> None:
+        self.min_text_bytes = min_text_bytes
+        self.dictionary_path = dictionary_path
+        self.compressor = None
+        self.decompressor = None
+        if compression != InboxCompression.ZSTD:
+            return
+        zstandard = load_zstandard()
+        if zstandard is None:
+            raise ImportError("zstd inbox compression requires the zstandard package")
+        self.compressor = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL, dict_data=self.dictionary(), write_checksum=False
+        )
+        self.decompressor = zstandard.ZstdDecompressor(dict_data=self.dictionary())
+
+    def dictionary(self) -> Any:
+        """
+        Словарь zstd из dictionary_path.
+
+        :return: zstandard.ZstdCompressionDict | None, словарь или None
+        """
+        if not self.dictionary_path:
+            return None
+        return load_zstandard().ZstdCompressionDict(
+            Path(self.dictionary_path).read_bytes()
+        )
+
+    def encode(self, msg: Message, appended_at: float) -> bytes:
+        """
+        Упаковка сообщения в запись входящих.
+
+        :param msg: Message, сообщение с примененной цензурой
+        :param appended_at: float, время записи во входящие в секундах Unix
+
+        :return: bytes, запись входящих
+        """
+        flags, sender = pack_user_id(msg.sender_id)
+        text = msg.text.encode()
+        if self.compressor is not None and len(text) >= self.min_text_bytes:
+            compressed = self.compressor.compress(text)
+            if len(compressed) < len(text):
+                flags |= FLAG_COMPRESSED
+                text = compressed
+        header = ENTRY_HEADER.pack(
+            flags | FLAG_APPENDED_AT, appended_at, msg.timestamp, len(sender)
+        )
+        return header + sender + text
+
+    def decode(self, entry: bytes, recipient_id: str) -> Message:
+        """
+        Восстановление сообщения из записи входящих.
+
+        :param entry: bytes, запись входящих
+        :param recipient_id: str, получатель из ключа записи
+
+        :raises ImportError: текст сжат, а zstandard не установлен
+
+        :return: Message, сообщение
+        """
+        if entry[:1] == LEGACY_ENTRY_PREFIX:
+            data = orjson.loads(entry)
+            return Message(
+                sender_id=data["sender_id"],
+                recipient_id=data["recipient_id"],
+                text=data["text"],
+                timestamp=data["timestamp"],
+            )
+        if entry[0] & FLAG_APPENDED_AT:
+            flags, _, timestamp, sender_size = ENTRY_HEADER.unpack_from(entry)
+            sender_start = ENTRY_HEADER.size
+        else:
+            flags, timestamp, sender_size = LEGACY_ENTRY_HEADER.unpack_from(entry)
+            sender_start = LEGACY_ENTRY_HEADER.size
+        text_start = sender_start + sender_size
+        sender = entry[sender_start:text_start]
+        text = entry[text_start:]
+        if flags & FLAG_COMPRESSED:
+            if self.decompressor is None:
+                # NOTE: запись сжата до смены настройки - разжатие создается
+                # при первой такой записи
+                if (zstandard := load_zstandard()) is None:
+                    raise ImportError(
+                        "inbox entry is zstd-compressed, install zstandard"
+                    )
+                self.decompressor = zstandard.ZstdDecompressor(
+                    dict_data=self.dictionary()
+                )
+            text = self.decompressor.decompress(text)
+        return Message(
+            sender_id=(
+                str(int.from_bytes(sender, "little"))
+                if flags & FLAG_INT_SENDER
+                else sender.decode()
+            ),
+            recipient_id=recipient_id,
+            text=text.decode(),
+            # NOTE: время хранится как float, целое возвращается целым
+            timestamp=int(timestamp) if timestamp.is_integer() else timestamp,
+        )
+
+    @staticmethod
+    def appended_at(entry: bytes) -> float:
+        """
+        Время записи во входящие без разбора остальной записи.
+
+        В записях, сохраненных до появления времени записи, его нет - для
+        них возвращается время сообщения.
+
+        :param entry: bytes, запись входящих
+
+        :return: float, время в секундах Unix
+        """
+        if entry[:1] == LEGACY_ENTRY_PREFIX:
+            return orjson.loads(entry)["timestamp"]
+        if entry[0] & FLAG_APPENDED_AT:
+            return ENTRY_HEADER.unpack_from(entry)[1]
+        return LEGACY_ENTRY_HEADER.unpack_from(entry)[1]
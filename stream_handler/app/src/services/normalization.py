@@ -0,0 +1,126 @@
+import unicodedata
+from functools import cache
+from typing import Final
+
+# NOTE: кириллица и греческий, визуально совпадающие с латиницей (по UTS #39)
+CONFUSABLES: Final[dict[str, str]] = {
+    "а": "a",
+    "в": "b",
+    "е": "e",
+    "к": "k",
+    "м": "m",
+    "н": "h",
+    "о": "o",
+    "р": "p",
+    "с": "c",
+    "т": "t",
+    "у": "y",
+    "х": "x",
+    "і": "i",
+    "ј": "j",
+    "ѕ": "s",
+    "α": "a",
+    "β": "b",
+    "ε": "e",
+    "ι": "i",
+    "κ": "k",
+    "ν": "v",
+    "ο": "o",
+    "ρ": "p",
+    "τ": "t",
+    "υ": "u",
+    "χ": "x",
+}
+LEETSPEAK: Final[dict[str, str]] = {
+    "0": "o",
+    "1": "i",
+    "3": "e",
+    "4": "a",
+    "5": "s",
+    "7": "t",
+    "@": "a",
+    "$": "s",
+}
+# NOTE: Cf - невидимые символы форматирования (U+200B, U+200D, U+FEFF, U+00AD),
+# Mn - комбинируемые диакритические знаки
+IGNORABLE_CATEGORIES: Final[frozenset[str]] = frozenset({"Cf", "Mn"})
+# NOTE: кроме BMP - математические буквы (U+1D400-U+1D7FF), популярные
+# для обхода фильтров
+EXTRA_RANGES: Final[tuple[range, ...]] = (range(0x1D400, 0x1D800),)
+
+
+def fold_char(char: str) -> str | None:
+    """
+    Нормализация одного символа для сравнения со словарем.
+
+    :param char: str, символ
+
+    :return: str | None, ровно один символ или None, если символ игнорируется
+    """
+    if unicodedata.category(char) in IGNORABLE_CATEGORIES:
+        return None
+    folded = char.lower()
+    if len(folded) != 1:  # NOTE: "İ".lower() == "i̇"
+        folded = folded[0]
+    compatible = unicodedata.normalize("NFKC", folded)
+    if len(compatible) == 1:  # NOTE: полноширинные и математические буквы
+        folded = compatible.lower()
+    base = unicodedata.normalize("NFD", folded)[0]  # NOTE: буква без диакритики
+    folded = CONFUSABLES.get(base, base)
+    return LEETSPEAK.get(folded, folded)
+
+
+@cache
+def fold_table() -> dict[int, str | None]:
+    """
+    Таблица для str.translate, собранная один раз при первом обращении.
+
+    Каждый символ отображается ровно в один символ или удаляется, поэтому
+    совпадение длины результата с исходной строкой означает, что смещения
+    не изменились.
+
+    :return: dict[int, str | None], код символа -> нормализованный символ
+    """
+    table: dict[int, str | None] = {}
+    for codepoints in (range(0x10000), *EXTRA_RANGES):
+        for codepoint in codepoints:
+            char = chr(codepoint)
+            if 0xD800 <= codepoint <= 0xDFFF:  # NOTE: суррогаты
+                continue
+            folded = fold_char(char)
+            if folded != char:
+                table[codepoint] = folded
+    return table
+
+
+def normalize(text: str) -> str:
+    """
+    Нормализация текста за один проход str.translate.
+
+    :param text: str, исходный текст
+
+    :return: str, нормализованный текст
+    """
+    return text.translate(fold_table())
+
+
+def normalize_with_offsets(text: str) -> tuple[str, list[int]]:
+    """
+    Нормализация текста с картой смещений в исходную строку.
+
+    Используется только для текстов, в которых есть игнорируемые символы.
+
+    :param text: str, исходный текст
+
+    :return: tuple[str, list[int]], нормализованный текст и индекс исходного
+        символа для каждого символа результата
+    """
+    table = fold_table()
+    chars: list[str] = []
+    offsets: list[int] = []
+    for index, char in enumerate(text):
+        folded = table.get(ord(char), char)
+        if folded is not None:
+            chars.append(folded)
+            offsets.append(index)
+    return "".join(chars), offsets
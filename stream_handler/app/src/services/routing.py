@@ -0,0 +1,291 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from functools import wraps
+from http import HTTPStatus
+from typing import Any, Final
+
+import aiohttp
+import faust
+from aiohttp.web_request import Request
+from aiohttp.web_response import Response
+from aiokafka.partitioner import DefaultPartitioner
+from faust.types import TP
+from yarl import URL
+
+from ..core.metrics import KEY_ROUTE_READS
+from .conditional import is_not_modified
+
+# NOTE: запрос, уже перенаправленный другим воркером, обрабатывается локально,
+# даже если назначение партиций успело измениться - без пересылок по кругу
+ROUTED_HEADER: Final[str] = "X-Routed-From"
+SERVED_FROM_HEADER: Final[str] = "X-Served-From"
+STALE_QUERY_PARAM: Final[str] = "stale"
+FORWARDED_HEADERS: Final[tuple[str, ...]] = ("Accept", "If-None-Match")
+
+ViewHandler = Callable[..., Awaitable[Response]]
+# NOTE: тело, тип содержимого, статус и ETag ответа
+CachedResponse = tuple[bytes, str, int, str | None]
+
+
+class ResponseCache:
+    """
+    Кеш готовых ответов GET с коротким временем жизни.
+
+    Хранит не более max_size ответов, при переполнении вытесняется давно не
+    запрошенный. ttl=0 отключает кеш.
+    """
+
+    __slots__ = ("ttl", "max_size", "entries")
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+
+    def get(self, key: str) -> CachedResponse | None:
+        """
+        Ответ из кеша.
+
+        :param key: str, путь запроса со строкой параметров
+
+        :return: CachedResponse | None, ответ или None, если ответа нет или
+            он устарел
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: CachedResponse) -> None:
+        """
+        Сохранение ответа.
+
+        :param key: str, путь запроса со строкой параметров
+        :param response: CachedResponse, ответ
+
+        :return: None
+        """
+        if not self.ttl:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, response)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+class KeyRouter:
+    """
+    Маршрутизация чтений по ключу к воркеру, владеющему партицией.
+
+    Партиция ключа вычисляется по исходному топику (тем же разбиением, что
+    у продюсеров), а владелец - по назначению партиций changelog таблицы.
+    Запрос обрабатывается локально, если партиция активна на этом воркере
+    или, при stale=true, если здесь есть ее standby-реплика; иначе он
+    пересылается владельцу. Ответы 200 кешируются на cache.ttl секунд.
+    """
+
+    __slots__ = ("cache", "forward_timeout")
+
+    def __init__(self, cache: ResponseCache, forward_timeout: float) -> None:
+        self.cache = cache
+        self.forward_timeout = forward_timeout
+
+    def route(
+        self,
+        app: faust.App,
+        view_name: str,
+        table: faust.Table,
+        topic: faust.Topic,
+        *,
+        query_param: str | None = None,
+        match_info: str | None = None,
+    ) -> Callable[[ViewHandler], ViewHandler]:
+        """
+        Декоратор GET-обработчика представления с ключом в запросе.
+
+        :param app: faust.App, экземпляр приложения
+        :param view_name: str, имя представления для метрик
+        :param table: faust.Table, таблица, из которой читает обработчик
+        :param topic: faust.Topic, исходный топик таблицы с тем же ключом
+        :param query_param: str | None, параметр запроса с ключом
+        :param match_info: str | None, параметр пути с ключом
+
+        :return: Callable, декоратор
+        """
+
+        def decorator(handler: ViewHandler) -> ViewHandler:
+            @wraps(handler)
+            async def get(
+                view: faust.web.View, request: Request, *args: Any, **kwargs: Any
+            ) -> Response:
+                if match_info is not None:
+                    key = request.match_info.get(match_info, "")
+                else:
+                    key = request.query.get(query_param or "", "")
+                if not key or ROUTED_HEADER in request.headers:
+                    return await handler(view, request, *args, **kwargs)
+
+                if cached := self.cache.get(request.path_qs):
+                    KEY_ROUTE_READS.inc(1, view_name, "cache")
+                    return self.to_response(view, request, cached, "cache")
+
+                source, owner_url = self.locate(app, table, topic, key, request)
+                if source == "owner":
+                    try:
+                        forwarded = await self.forward(app, request, owner_url)
+                    except (aiohttp.ClientError, asyncio.TimeoutError):
+                        source = "unavailable"
+                    else:
+                        response = self.to_response(view, request, forwarded, source)
+                if source == "unavailable":
+                    KEY_ROUTE_READS.inc(1, view_name, source)
+                    return view.json(
+                        {"error": "partition owner is unavailable, retry later"},
+                        status=HTTPStatus.SERVICE_UNAVAILABLE,
+                    )
+                if source != "owner":
+                    response = await handler(view, request, *args, **kwargs)
+                KEY_ROUTE_READS.inc(1, view_name, source)
+                if response.status == HTTPStatus.OK and response.body is not None:
+                    self.cache.put(
+                        request.path_qs,
+                        (
+                            response.body,
+                            response.content_type,
+                            response.status,
+                            response.headers.get("ETag"),
+                        ),
+                    )
+                response.headers[SERVED_FROM_HEADER] = source
+                return response
+
+            return get
+
+        return decorator
+
+    def locate(
+        self,
+        app: faust.App,
+        table: faust.Table,
+        topic: faust.Topic,
+        key: str,
+        request: Request,
+    ) -> tuple[str, str | None]:
+        """
+        Откуда отвечать на запрос по ключу.
+
+        :return: tuple[str, str | None], источник ("local", "standby", "owner"
+            или "unavailable") и адрес владельца для "owner"
+        """
+        # NOTE: то же разбиение, что у продюсера (murmur2 от ключа), без
+        # обращения к метаданным кластера
+        partition = DefaultPartitioner()(
+            key.encode(), list(range(topic.partitions)), None
+        )
+        return self.locate_partition(app, table, partition, request)
+
+    @staticmethod
+    def locate_partition(
+        app: faust.App, table: faust.Table, partition: int, request: Request
+    ) -> tuple[str, str | None]:
+        """
+        Откуда читать партицию таблицы.
+
+        :return: tuple[str, str | None], источник ("local", "standby", "owner"
+            или "unavailable") и адрес владельца для "owner"
+        """
+        changelog_topic = table.changelog_topic.get_topic_name()
+        tp = TP(changelog_topic, partition)
+        if tp in app.assignor.assigned_actives():
+            return "local", None
+        stale = request.query.get(STALE_QUERY_PARAM, "").lower() in ("1", "true")
+        if stale and tp in app.assignor.assigned_standbys():
+            return "standby", None
+        for url, topics in app.router.table_metadata(table.name).items():
+            if partition in topics.get(changelog_topic, ()):
+                if url == str(app.conf.canonical_url):
+                    # NOTE: назначение еще не применено локально
+                    return "local", None
+                return "owner", url
+        return "unavailable", None
+
+    @staticmethod
+    def active_partitions(app: faust.App, table: faust.Table) -> list[int]:
+        """
+        Партиции таблицы, активные на этом воркере.
+
+        :return: list[int], номера партиций по возрастанию
+        """
+        changelog_topic = table.changelog_topic.get_topic_name()
+        return sorted(
+            tp.partition
+            for tp in app.assignor.assigned_actives()
+            if tp.topic == changelog_topic
+        )
+
+    @staticmethod
+    def to_response(
+        view: faust.web.View, request: Request, cached: CachedResponse, source: str
+    ) -> Response:
+        """
+        Ответ клиенту из кешированного или пересланного ответа.
+
+        Если ETag ответа совпадает с If-None-Match запроса, возвращается 304.
+        """
+        body, content_type, status, etag = cached
+        headers = {SERVED_FROM_HEADER: source}
+        if etag is not None:
+            headers["ETag"] = etag
+            if status == HTTPStatus.OK and is_not_modified(request, etag):
+                body, status = b"", HTTPStatus.NOT_MODIFIED
+        return view.bytes(
+            body, content_type=content_type, status=status, headers=headers
+        )
+
+    async def forward(
+        self, app: faust.App, request: Request, owner_url: str
+    ) -> CachedResponse:
+        """
+        Пересылка запроса воркеру-владельцу.
+
+        :return: CachedResponse, ответ владельца
+        """
+        headers = {
+            name: request.headers[name]
+            for name in FORWARDED_HEADERS
+            if name in request.headers
+        }
+        return await self.fetch(app, URL(owner_url).join(request.rel_url), headers)
+
+    async def fetch(
+        self, app: faust.App, target: URL, headers: dict[str, str] | None = None
+    ) -> CachedResponse:
+        """
+        GET-запрос к другому воркеру с пометкой перенаправленного запроса.
+
+        :param app: faust.App, экземпляр приложения
+        :param target: URL, адрес запроса
+        :param headers: dict[str, str] | None, дополнительные заголовки
+            :default None
+
+        :return: CachedResponse, ответ воркера
+        """
+        headers = {**(headers or {}), ROUTED_HEADER: str(app.conf.canonical_url)}
+        async with app.http_client.get(
+            target,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.forward_timeout),
+        ) as response:
+            return (
+                await response.read(),
+                response.content_type,
+                response.status,
+                response.headers.get("ETag"),
+            )
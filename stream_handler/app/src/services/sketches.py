@@ -0,0 +1,203 @@
+import base64
+import math
+from hashlib import blake2b
+
+from ..core.const import (
+    COUNT_MIN_DEPTH,
+    COUNT_MIN_WIDTH,
+    HEAVY_HITTERS_K,
+    HLL_PRECISION,
+)
+
+HASH_BITS = 64
+
+
+def hash64(value: str) -> int:
+    """
+    Стабильный между процессами 64-битный хеш строки.
+
+    Встроенный hash() для строк рандомизирован, поэтому для состояния,
+    которое пишется в changelog и читается другими воркерами, не подходит.
+    """
+    return int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """
+    Приближенный подсчет количества уникальных значений.
+
+    Состояние - 2**precision однобайтовых регистров независимо от количества
+    добавленных значений; стандартная ошибка оценки 1.04 / sqrt(2**precision).
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(
+        self, precision: int = HLL_PRECISION, registers: bytearray | None = None
+    ) -> None:
+        self.precision = precision
+        self.registers = registers or bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        """
+        Добавление значения.
+
+        :param value: str, значение
+
+        :return: None
+        """
+        h = hash64(value)
+        index = h >> (HASH_BITS - self.precision)
+        rest_bits = HASH_BITS - self.precision
+        rank = rest_bits - (h & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """
+        Объединение с другим счетчиком той же точности.
+
+        :param other: HyperLogLog, счетчик
+
+        :return: None
+        """
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """
+        Оценка количества уникальных значений.
+
+        :return: int, оценка
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # NOTE: на малых количествах точнее линейный подсчет
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def dumps(self) -> str:
+        """
+        Сериализация регистров для хранения в записи таблицы.
+
+        :return: str, регистры в base64
+        """
+        return base64.b64encode(self.registers).decode()
+
+    @classmethod
+    def loads(cls, data: str) -> "HyperLogLog":
+        """
+        Восстановление счетчика из результата dumps().
+
+        :param data: str, регистры в base64; пустая строка - пустой счетчик
+
+        :return: HyperLogLog, счетчик
+        """
+        if not data:
+            return cls()
+        registers = bytearray(base64.b64decode(data))
+        return cls(len(registers).bit_length() - 1, registers)
+
+
+class CountMinSketch:
+    """
+    Приближенные частоты значений в фиксированной памяти.
+
+    Оценка частоты никогда не меньше истинной и превышает ее не более чем
+    на e / width от суммы всех частот с вероятностью 1 - exp(-depth).
+    """
+
+    __slots__ = ("width", "depth", "rows")
+
+    def __init__(
+        self, width: int = COUNT_MIN_WIDTH, depth: int = COUNT_MIN_DEPTH
+    ) -> None:
+        self.width = width
+        self.depth = depth
+        self.rows: list[list[int]] = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, value: str) -> list[int]:
+        # NOTE: depth хешей из одного 64-битного (двойное хеширование)
+        h = hash64(value)
+        h1, h2 = h & 0xFFFFFFFF, h >> 32
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, value: str, count: int = 1) -> int:
+        """
+        Увеличение частоты значения.
+
+        :param value: str, значение
+        :param count: int, приращение
+
+        :return: int, новая оценка частоты значения
+        """
+        estimate = None
+        for row, index in zip(self.rows, self._indexes(value)):
+            row[index] += count
+            if estimate is None or row[index] < estimate:
+                estimate = row[index]
+        return estimate or 0
+
+    def estimate(self, value: str) -> int:
+        """
+        Оценка частоты значения.
+
+        :param value: str, значение
+
+        :return: int, оценка частоты
+        """
+        return min(row[index] for row, index in zip(self.rows, self._indexes(value)))
+
+
+class HeavyHitters:
+    """
+    Top-K самых частых значений поверх count-min sketch.
+
+    Кроме скетча хранится не более k кандидатов с их оценками; новое значение
+    вытесняет кандидата с наименьшей оценкой, только если его оценка больше.
+    """
+
+    __slots__ = ("k", "sketch", "candidates")
+
+    def __init__(self, k: int = HEAVY_HITTERS_K) -> None:
+        self.k = k
+        self.sketch = CountMinSketch()
+        self.candidates: dict[str, int] = {}
+
+    def add(self, value: str, count: int = 1) -> None:
+        """
+        Учет появлений значения.
+
+        :param value: str, значение
+        :param count: int, количество появлений
+
+        :return: None
+        """
+        estimate = self.sketch.add(value, count)
+        candidates = self.candidates
+        if value in candidates or len(candidates) < self.k:
+            candidates[value] = estimate
+            return
+        weakest = min(candidates, key=candidates.__getitem__)
+        if estimate > candidates[weakest]:
+            del candidates[weakest]
+            candidates[value] = estimate
+
+    def top(self) -> dict[str, int]:
+        """
+        Кандидаты с оценками частот, по убыванию.
+
+        :return: dict[str, int], значение -> оценка частоты
+        """
+        return dict(sorted(self.candidates.items(), key=lambda kv: -kv[1]))
+
+    def reset(self) -> None:
+        """
+        Сброс накопленных частот.
+
+        :return: None
+        """
+        self.sketch = CountMinSketch(self.sketch.width, self.sketch.depth)
+        self.candidates = {}
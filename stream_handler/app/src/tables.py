@@ -1,7 +1,7 @@
 import faust
 
 from .core.const import DAY_SECONDS, DEFAULT_BANNED_WORDS
-from .core.types import AppTables
+from .core.types import AppTables, SenderStats
 
 
 def create_tables(faust_app: faust.App) -> AppTables:
@@ -13,11 +13,16 @@ def create_tables(faust_app: faust.App) -> AppTables:
     :return: AppTables, таблицы приложения
     """
     return AppTables(
-        banned_words=faust_app.Table(
+        # NOTE: словарь нужен каждому воркеру целиком, поэтому таблица глобальная:
+        # все экземпляры приложения читают ее changelog и строят локальный автомат.
+        # partitions=1 и recovery_buffer_size=1 - рекомендация faust для GlobalTable
+        banned_words=faust_app.GlobalTable(
             name="banned_words",
-            default=lambda: DEFAULT_BANNED_WORDS,
+            default=lambda: set(DEFAULT_BANNED_WORDS),
             help="Запрещенные слова",
-            partitions=3,
+            partitions=1,
+            recovery_buffer_size=1,
+            use_partitioner=True,
         ),
         blocked_users=faust_app.Table(
             name="blocked_users",
@@ -25,13 +30,86 @@ def create_tables(faust_app: faust.App) -> AppTables:
             help="Заблокированные пользователи",
             partitions=3,
         ),
+        # NOTE: счетчик изменений блокировок пользователя для ETag ответов;
+        # ключ и партиции те же, что у blocked_users
+        blocked_users_versions=faust_app.Table(
+            name="blocked_users_versions",
+            default=int,
+            help="Количество изменений блокировок пользователя",
+            partitions=3,
+        ),
+        # NOTE: счетчик изменений блокировок по партициям для ETag списка
+        # пользователей; ключ - номер партиции blocked_users
+        blocked_users_changes=faust_app.Table(
+            name="blocked_users_changes",
+            default=int,
+            help="Количество изменений блокировок по партициям",
+            partitions=3,
+        ),
+        # NOTE: входящие хранятся append-only: одна запись на сообщение с ключом
+        # "<recipient_id>:<sequence>" и счетчик-голова на получателя, поэтому
+        # каждое сообщение стоит O(1) записей в хранилище и changelog.
+        # Значение - компактная запись InboxCodec; при value_type=bytes faust
+        # хранит и пишет ее в changelog как есть, без JSON
         messages_filtered=faust_app.Table(
             name="messages_filtered",
-            default=list,
+            value_type=bytes,
             help="Фильтрованные сообщения",
             partitions=3,
         ).tumbling(
             size=DAY_SECONDS,
             expires=DAY_SECONDS,
         ),
+        messages_filtered_heads=faust_app.Table(
+            name="messages_filtered_heads",
+            default=int,
+            help="Количество фильтрованных сообщений получателя",
+            partitions=3,
+        ).tumbling(
+            size=DAY_SECONDS,
+            expires=DAY_SECONDS,
+        ),
+        # NOTE: размер записи фиксирован: счетчик, регистры HyperLogLog
+        # и не более STATS_RECENT_TEXTS последних текстов
+        sender_stats=faust_app.Table(
+            name="sender_stats",
+            value_type=SenderStats,
+            help="Статистика отправителя за сутки",
+            partitions=3,
+        ).tumbling(
+            size=DAY_SECONDS,
+            expires=DAY_SECONDS,
+        ),
+        # NOTE: итоги за сутки по партициям (см. sender_stats_totals_key)
+        sender_stats_totals=faust_app.Table(
+            name="sender_stats_totals",
+            default=int,
+            help="Сообщения и отправители за сутки по партициям",
+            partitions=3,
+        ).tumbling(
+            size=DAY_SECONDS,
+            expires=DAY_SECONDS,
+        ),
+        # NOTE: два ключа (слова и отправители) по HEAVY_HITTERS_K значений;
+        # воркеры периодически присылают свои top-K, агент их суммирует
+        censor_stats=faust_app.Table(
+            name="censor_stats",
+            default=dict,
+            help="Самые частые запрещенные слова и отправители за сутки",
+            partitions=1,
+        ).tumbling(
+            size=DAY_SECONDS,
+            expires=DAY_SECONDS,
+        ),
+        # NOTE: счетчик слияний censor_stats для ETag; отдельная таблица,
+        # чтобы в censor_stats хранились только словари
+        censor_stats_versions=faust_app.Table(
+            name="censor_stats_versions",
+            default=int,
+            help="Количество слияний статистики цензуры за сутки",
+            partitions=1,
+        ).tumbling(
+            size=DAY_SECONDS,
+            expires=DAY_SECONDS,
+        ),
     )
@@ -1,6 +1,14 @@
 import faust
 
-from .core.types import AppTopics, BannedWord, Message, UserBlockingRecord
+from .core.codecs import register_codecs
+from .core.config import settings
+from .core.types import (
+    AppTopics,
+    BannedWord,
+    CensorHitsSnapshot,
+    Message,
+    UserBlockingRecord,
+)
 
 
 def register_topics(faust_app: faust.App) -> AppTopics:
@@ -11,29 +19,54 @@ def register_topics(faust_app: faust.App) -> AppTopics:
 
     :return: AppTopics, топики кафки
     """
+    register_codecs()
+    # NOTE: messages и filtered_messages ключуются recipient_id, blocked_users -
+    # user_id блокирующего (то есть получателя). Ключи - строки, количество
+    # партиций одинаковое, поэтому цензура, проверка блокировок и запись во
+    # входящие для получателя выполняются на одной партиции одного воркера
     return AppTopics(
         messages_raw=faust_app.topic(
             "messages",
-            key_type=int,
+            key_type=str,
             value_type=Message,
+            value_serializer=settings.messages_serializer,
             partitions=3,
         ),
         messages_filtered=faust_app.topic(
             "filtered_messages",
-            key_type=int,
+            key_type=str,
             value_type=Message,
+            value_serializer=settings.filtered_messages_serializer,
+            partitions=3,
+        ),
+        # NOTE: сообщения, которые не удалось цензурировать или отправить
+        # за CENSOR_MAX_ATTEMPTS попыток; ошибка - в заголовке error
+        messages_dead_letter=faust_app.topic(
+            "dead_letter_messages",
+            key_type=str,
+            value_type=Message,
+            value_serializer=settings.messages_serializer,
             partitions=3,
         ),
         blocked_users=faust_app.topic(
             "blocked_users",
-            key_type=int,
+            key_type=str,
             value_type=UserBlockingRecord,
+            value_serializer=settings.blocked_users_serializer,
             partitions=3,
         ),
         banned_words=faust_app.topic(
             "banned_words",
             key_type=str,
             value_type=BannedWord,
+            value_serializer=settings.banned_words_serializer,
             partitions=3,
         ),
+        censor_stats=faust_app.topic(
+            "censor_stats",
+            key_type=str,
+            value_type=CensorHitsSnapshot,
+            value_serializer=settings.censor_stats_serializer,
+            partitions=1,
+        ),
     )
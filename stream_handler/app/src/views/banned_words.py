@@ -1,13 +1,27 @@
+import time
 from http import HTTPStatus
 
 import faust
+import orjson
 from aiohttp.web_request import Request
 from aiohttp.web_response import Response
 from pydantic import ValidationError
 
-from ..core.utils import get_serializer_errors
+from ..core.const import (
+    BANNED_WORDS_KEY,
+    CENSOR_STATS_SENDERS_KEY,
+    CENSOR_STATS_VERSION_KEY,
+    CENSOR_STATS_WORDS_KEY,
+    HEAVY_HITTERS_K,
+)
+from ..core.utils import banned_words_version, get_serializer_errors
 from ..dependencies import AppDependencies
 from ..schemas import BannedWordsSerializer
+from ..services.conditional import make_etag, not_modified_response
+
+
+def top(counts: dict[str, int], limit: int) -> list[tuple[str, int]]:
+    return sorted(counts.items(), key=lambda kv: -kv[1])[:limit]
 
 
 def banned_words_view(app: faust.App, dependencies: AppDependencies) -> None:
@@ -32,11 +46,26 @@ def banned_words_view(app: faust.App, dependencies: AppDependencies) -> None:
                 return self.json(
                     {"errors": get_serializer_errors(e)}, status=HTTPStatus.BAD_REQUEST
                 )
-            for word in {word.strip().lower() for word in serializer.words}:
-                await dependencies.topics.banned_words.send(
-                    key=word,
-                    value={"word": word, "operation_type": serializer.operation_type},
+            words = {word.strip().lower() for word in serializer.words}
+            reservation = dependencies.admission.reserve(len(words), "banned_words")
+            if reservation is None:
+                return self.json(
+                    {"error": "too many requests in flight, retry later"},
+                    status=HTTPStatus.TOO_MANY_REQUESTS,
+                    headers=dependencies.admission.retry_headers,
                 )
+            with reservation:
+                for word in words:
+                    # NOTE: единый ключ - все изменения словаря попадают в одну партицию
+                    # и применяются одним агентом по порядку, версия растет монотонно
+                    await reservation.send(
+                        dependencies.topics.banned_words,
+                        key=BANNED_WORDS_KEY,
+                        value={
+                            "word": word,
+                            "operation_type": serializer.operation_type,
+                        },
+                    )
             dependencies.logger.info(
                 "User trying to update banned words by API: %s %s",
                 serializer.operation_type,
@@ -47,6 +76,72 @@ def banned_words_view(app: faust.App, dependencies: AppDependencies) -> None:
         async def get(self, request: Request) -> Response:
             """
             Получение списка запрещенных слов.
+
+            ETag - версия словаря из таблицы; сериализованный список хранится
+            до следующего изменения словаря.
+            """
+            table = dependencies.tables.banned_words
+            version = banned_words_version(table)
+            etag = make_etag("banned-words", version)
+            if response := not_modified_response(self, request, etag):
+                return response
+            body = dependencies.response_cache.get_or_build(
+                (BANNED_WORDS_KEY,),
+                version,
+                lambda: orjson.dumps(sorted(table.get(BANNED_WORDS_KEY, set()))),
+            )
+            return self.bytes(
+                body,
+                content_type="application/json",
+                status=HTTPStatus.OK,
+                headers={"ETag": etag},
+            )
+
+    @app.page("/banned_words/stats/")
+    class BannedWordsStatsView(faust.web.View):
+        """
+        Представление статистики срабатываний цензуры.
+        """
+
+        async def get(self, request: Request) -> Response:
+            """
+            Самые частые запрещенные слова и отправители, чьи сообщения
+            цензурировались, за текущие сутки.
+
+            Количества приблизительные (count-min sketch) и обновляются раз
+            в CENSOR_STATS_FLUSH_INTERVAL_SEC секунд. ETag - начало суток и
+            счетчик слияний статистики.
             """
-            words: set[str] = dependencies.tables.banned_words.get("global", set())
-            return self.json(set(words), status=HTTPStatus.OK)
+            try:
+                limit = int(request.query.get("limit", 10))
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return self.json(
+                    {"error": "limit must be a positive integer"},
+                    status=HTTPStatus.BAD_REQUEST,
+                )
+            limit = min(limit, HEAVY_HITTERS_K)
+            stats_table = dependencies.tables.censor_stats
+            window_start: float = stats_table.table.window.earliest(time.time())[0]
+            versions = dependencies.tables.censor_stats_versions
+            version: int = versions[CENSOR_STATS_VERSION_KEY].now()
+            etag = make_etag("censor_stats", int(window_start), version, limit)
+            if response := not_modified_response(self, request, etag):
+                return response
+            words: dict[str, int] = stats_table[CENSOR_STATS_WORDS_KEY].now()
+            senders: dict[str, int] = stats_table[CENSOR_STATS_SENDERS_KEY].now()
+            return self.json(
+                {
+                    "words": [
+                        {"word": word, "count": count}
+                        for word, count in top(words, limit)
+                    ],
+                    "senders": [
+                        {"sender_id": sender_id, "count": count}
+                        for sender_id, count in top(senders, limit)
+                    ],
+                },
+                status=HTTPStatus.OK,
+                headers={"ETag": etag},
+            )
@@ -0,0 +1,142 @@
+import asyncio
+import hmac
+from http import HTTPStatus
+
+import faust
+from aiohttp.web_request import Request
+from aiohttp.web_response import Response
+
+from ..core.config import settings
+from ..dependencies import AppDependencies
+from ..services.diagnostics import (
+    PROFILE_SORT_KEYS,
+    dump_profile,
+    format_profile,
+    measure_loop,
+    profile_loop,
+)
+
+
+def debug_view(app: faust.App, dependencies: AppDependencies) -> None:
+    """
+    Регистрация страниц диагностики работающего воркера.
+
+    Страницы регистрируются только при заданном DEBUG_TOKEN и требуют
+    заголовок "Authorization: Bearer <DEBUG_TOKEN>". Профилировщик и режим
+    отладки loop включаются только на время запроса, поэтому без запросов
+    страницы ничего не стоят. Одновременно выполняется один замер.
+    Каждый воркер диагностирует только себя.
+    """
+    if not settings.debug_token:
+        return
+    expected_authorization = f"Bearer {settings.debug_token}".encode()
+    session = asyncio.Lock()
+
+    def check_request(view: faust.web.View, request: Request) -> Response | float:
+        """
+        Проверка токена, занятости и длительности замера.
+
+        :return: Response | float, ответ с ошибкой или длительность в секундах
+        """
+        authorization = request.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(authorization, expected_authorization):
+            return view.json(
+                {"error": "unauthorized"},
+                status=HTTPStatus.UNAUTHORIZED,
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        if session.locked():
+            return view.json(
+                {"error": "another debug session is running"},
+                status=HTTPStatus.CONFLICT,
+            )
+        try:
+            seconds = float(request.query.get("seconds", 10))
+        except ValueError:
+            seconds = 0.0
+        if not 0 < seconds <= settings.debug_max_seconds:
+            return view.json(
+                {
+                    "error": "seconds must be in (0, "
+                    f"{settings.debug_max_seconds:g}]"
+                },
+                status=HTTPStatus.BAD_REQUEST,
+            )
+        return seconds
+
+    @app.page("/debug/profile/")
+    class ProfileView(faust.web.View):
+        async def get(self, request: Request) -> Response:
+            """
+            Профилирование event loop воркера в течение seconds секунд.
+
+            format=text (по умолчанию) возвращает limit функций с сортировкой
+            sort (cumulative, tottime, calls), format=pstats - файл pstats
+            для python -m pstats, snakeviz или flameprof.
+            """
+            checked = check_request(self, request)
+            if isinstance(checked, Response):
+                return checked
+            output = request.query.get("format", "text")
+            sort = request.query.get("sort", "cumulative")
+            try:
+                limit = int(request.query.get("limit", 40))
+            except ValueError:
+                limit = 0
+            if output not in ("text", "pstats") or sort not in PROFILE_SORT_KEYS:
+                return self.json(
+                    {
+                        "error": "format must be text or pstats, sort one of "
+                        + ", ".join(sorted(PROFILE_SORT_KEYS))
+                    },
+                    status=HTTPStatus.BAD_REQUEST,
+                )
+            if limit < 1:
+                return self.json(
+                    {"error": "limit must be a positive integer"},
+                    status=HTTPStatus.BAD_REQUEST,
+                )
+            async with session:
+                dependencies.logger.info("Profiling event loop for %gs", checked)
+                profiler = await profile_loop(checked)
+            if output == "pstats":
+                return self.bytes(
+                    dump_profile(profiler),
+                    content_type="application/octet-stream",
+                    headers={
+                        "Content-Disposition": 'attachment; filename="profile.pstats"'
+                    },
+                )
+            return self.text(format_profile(profiler, sort, limit))
+
+    @app.page("/debug/loop/")
+    class LoopView(faust.web.View):
+        async def get(self, request: Request) -> Response:
+            """
+            Задержка event loop и медленные обратные вызовы за seconds секунд.
+
+            Вызовы дольше threshold_ms (по умолчанию 100) ищутся в режиме
+            отладки asyncio; threshold_ms=0 отключает поиск и оставляет
+            только замер задержки.
+            """
+            checked = check_request(self, request)
+            if isinstance(checked, Response):
+                return checked
+            try:
+                threshold_ms = float(request.query.get("threshold_ms", 100))
+            except ValueError:
+                threshold_ms = -1.0
+            if threshold_ms < 0:
+                return self.json(
+                    {"error": "threshold_ms must be a non-negative number"},
+                    status=HTTPStatus.BAD_REQUEST,
+                )
+            async with session:
+                dependencies.logger.info("Measuring event loop lag for %gs", checked)
+                report = await measure_loop(
+                    checked, threshold_ms / 1000 if threshold_ms else None
+                )
+            return self.json(
+                {"seconds": checked, "threshold_ms": threshold_ms, **report},
+                status=HTTPStatus.OK,
+            )
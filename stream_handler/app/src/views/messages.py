@@ -1,16 +1,79 @@
+import asyncio
 import datetime as dt
+import logging
+import time
 from http import HTTPStatus
 from typing import Any
 
 import faust
+import orjson
 from aiohttp.web_request import Request
 from aiohttp.web_response import Response
 from pydantic import ValidationError
 
+from ..core.const import MESSAGES_BATCH_MAX_SIZE
 from ..core.types import Message
-from ..core.utils import get_serializer_errors
+from ..core.utils import (
+    decode_cursor,
+    encode_cursor,
+    get_serializer_errors,
+    inbox_entry_key,
+)
 from ..dependencies import AppDependencies
 from ..schemas import MessageSerializer
+from ..services.conditional import make_etag, not_modified_response
+from ..services.inbox import InboxCodec
+
+
+def find_first_after(
+    messages_table: faust.Table, user_id: str, head: int, since: float
+) -> int:
+    """
+    Бинарный поиск первого сообщения получателя, записанного позже since.
+
+    Читает O(log n) записей. Поиск идет по времени записи во входящие, а не
+    по времени из сообщения: его задает клиент, и оно может убывать, а время
+    записи store_message не убывает с ростом порядкового номера.
+
+    :param messages_table: faust.Table, оконная таблица фильтрованных сообщений
+    :param user_id: str, идентификатор получателя
+    :param head: int, количество сообщений получателя за текущие сутки
+    :param since: float, время в секундах Unix
+
+    :return: int, порядковый номер первого сообщения, записанного после since
+    """
+    low, high = 0, head
+    while low < high:
+        middle = (low + high) // 2
+        try:
+            entry = messages_table[inbox_entry_key(user_id, middle)].now()
+        except KeyError:
+            low = middle + 1
+            continue
+        if InboxCodec.appended_at(entry) > since:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def parse_messages_batch(body: bytes, content_type: str) -> list[Any]:
+    """
+    Разбор тела пакетного запроса: NDJSON или JSON-массив сообщений.
+
+    :param body: bytes, тело запроса
+    :param content_type: str, тип содержимого запроса
+
+    :raises ValueError: тело запроса не является NDJSON или JSON-массивом
+
+    :return: list[Any], сообщения в исходном порядке
+    """
+    if content_type == "application/x-ndjson":
+        return [orjson.loads(line) for line in body.splitlines() if line.strip()]
+    items = orjson.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("request body must be a JSON array or NDJSON")
+    return items
 
 
 def messages_view(app: faust.App, dependencies: AppDependencies) -> None:
@@ -31,50 +94,214 @@ def messages_view(app: faust.App, dependencies: AppDependencies) -> None:
                 return self.json(
                     {"errors": get_serializer_errors(e)}, status=HTTPStatus.BAD_REQUEST
                 )
-            if str(serializer.sender_id) in dependencies.tables.blocked_users.get(
-                str(serializer.recipient_id), set()
+            if dependencies.blocked_pairs.is_blocked(
+                str(serializer.recipient_id), str(serializer.sender_id)
             ):
                 return self.json(
                     {"error": "you were blocked by this user"},
                     status=HTTPStatus.FORBIDDEN,
                 )
-            await dependencies.topics.messages_raw.send(
-                key=str(serializer.recipient_id),
-                value=Message(
-                    sender_id=str(serializer.sender_id),
-                    recipient_id=str(serializer.recipient_id),
-                    text=serializer.text,
-                    timestamp=dt.datetime.now(dt.timezone.utc).timestamp(),
-                ),
-            )
-            dependencies.logger.info(
+            reservation = dependencies.admission.reserve(1, "messages")
+            if reservation is None:
+                return self.json(
+                    {"error": "too many requests in flight, retry later"},
+                    status=HTTPStatus.TOO_MANY_REQUESTS,
+                    headers=dependencies.admission.retry_headers,
+                )
+            with reservation:
+                await reservation.send(
+                    dependencies.topics.messages_raw,
+                    key=str(serializer.recipient_id),
+                    value=Message(
+                        sender_id=str(serializer.sender_id),
+                        recipient_id=str(serializer.recipient_id),
+                        text=serializer.text,
+                        timestamp=dt.datetime.now(dt.timezone.utc).timestamp(),
+                    ),
+                )
+            dependencies.logger.sampled(
+                logging.INFO,
+                "messages sent by API",
                 "Message from user %s to user %s sent by API.",
                 serializer.sender_id,
                 serializer.recipient_id,
             )
             return self.json("accepted", status=HTTPStatus.ACCEPTED)
 
+        @dependencies.key_router.route(
+            app,
+            "messages",
+            dependencies.tables.messages_filtered.table,
+            dependencies.topics.messages_raw,
+            query_param="user_id",
+        )
         async def get(self, request: Request) -> Response:
             """
-            Получение списка всех сообщений.
+            Получение сообщений пользователя за текущие сутки.
+
+            Страница читает из хранилища только limit записей. Следующая
+            страница запрашивается по курсору next_cursor из ответа; since
+            возвращает сообщения, отправленные позже указанного времени.
+            Запрос обрабатывает воркер, владеющий партицией user_id
+            (см. KeyRouter). Входящие пополняются только в конец, поэтому
+            ETag строится из окна, счетчика-головы получателя и границ
+            страницы; при совпадении записи не читаются.
             """
-            user_id: str = request.match_info.get("user_id", "")
-            limit = min(int(request.query.get("limit", 50)), 100)
-            offset = int(request.query.get("offset", 0))
+            try:
+                limit = int(request.query.get("limit", 50))
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return self.json(
+                    {"error": "limit must be a positive integer"},
+                    status=HTTPStatus.BAD_REQUEST,
+                )
+            limit = min(limit, 100)
+            try:
+                offset = int(request.query.get("offset", 0))
+            except ValueError:
+                offset = -1
+            if offset < 0:
+                return self.json(
+                    {"error": "offset must be a non-negative integer"},
+                    status=HTTPStatus.BAD_REQUEST,
+                )
             if not (user_id := request.query.get("user_id", "")):
                 return self.json(
                     {"error": "user_id query parameter is required"},
                     status=HTTPStatus.BAD_REQUEST,
                 )
+            heads_table = dependencies.tables.messages_filtered_heads
+            messages_table = dependencies.tables.messages_filtered
+            window_start: float = heads_table.table.window.earliest(time.time())[0]
+            head: int = heads_table[user_id].now()
+
+            if cursor := request.query.get("cursor"):
+                try:
+                    cursor_window, start = decode_cursor(cursor, size=2)
+                except ValueError as e:
+                    return self.json({"error": str(e)}, status=HTTPStatus.BAD_REQUEST)
+                if cursor_window != window_start:  # NOTE: курсор из прошлых суток
+                    start = 0
+            elif since := request.query.get("since"):
+                try:
+                    start = find_first_after(
+                        messages_table, user_id, head, float(since)
+                    )
+                except ValueError:
+                    return self.json(
+                        {"error": "since must be a unix timestamp"},
+                        status=HTTPStatus.BAD_REQUEST,
+                    )
+            else:
+                start = offset
+
+            stop = min(head, start + limit)
+            etag = make_etag("messages", user_id, int(window_start), head, start, stop)
+            if response := not_modified_response(self, request, etag):
+                return response
+            inbox_codec = dependencies.inbox_codec
+            messages: list[Message] = []
+            for sequence in range(start, stop):
+                try:
+                    entry: bytes = messages_table[
+                        inbox_entry_key(user_id, sequence)
+                    ].now()
+                except KeyError:
+                    continue
+                messages.append(inbox_codec.decode(entry, user_id))
             return self.json(
                 {
                     "user_id": user_id,
-                    "messages": [
-                        msg
-                        for msg in dependencies.tables.messages_filtered.get(
-                            user_id, []
-                        ).now()[offset : offset + limit]
-                    ],
+                    "messages": messages,
+                    "next_cursor": encode_cursor(window_start, max(start, stop)),
                 },
                 status=HTTPStatus.OK,
+                headers={"ETag": etag},
+            )
+
+    @app.page("/messages/batch/")
+    class MessagesBatchView(faust.web.View):
+        async def post(self, request: Request) -> Response:
+            """
+            Пакетная отправка сообщений (NDJSON или JSON-массив).
+
+            Сообщения проверяются за один проход, отправки в топик выполняются
+            без ожидания друг друга, после чего дожидаемся подтверждения всей
+            группы. В ответе - статус каждого сообщения по его индексу.
+            """
+            try:
+                items = parse_messages_batch(await request.read(), request.content_type)
+            except ValueError as e:  # NOTE: orjson.JSONDecodeError - тоже ValueError
+                return self.json({"error": str(e)}, status=HTTPStatus.BAD_REQUEST)
+            if len(items) > MESSAGES_BATCH_MAX_SIZE:
+                return self.json(
+                    {"error": f"batch size exceeds {MESSAGES_BATCH_MAX_SIZE} messages"},
+                    status=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                )
+            reservation = dependencies.admission.reserve(len(items), "messages_batch")
+            if reservation is None:
+                return self.json(
+                    {"error": "too many requests in flight, retry later"},
+                    status=HTTPStatus.TOO_MANY_REQUESTS,
+                    headers=dependencies.admission.retry_headers,
+                )
+
+            timestamp = dt.datetime.now(dt.timezone.utc).timestamp()
+            results: list[dict[str, Any]] = []
+            pending: list[tuple[int, asyncio.Future]] = []
+            with reservation:
+                for index, item in enumerate(items):
+                    try:
+                        serializer = MessageSerializer.model_validate(item)
+                    except ValidationError as e:
+                        results.append(
+                            {
+                                "index": index,
+                                "status": "invalid",
+                                "errors": get_serializer_errors(e),
+                            }
+                        )
+                        continue
+                    sender_id = str(serializer.sender_id)
+                    recipient_id = str(serializer.recipient_id)
+                    if dependencies.blocked_pairs.is_blocked(recipient_id, sender_id):
+                        results.append({"index": index, "status": "blocked"})
+                        continue
+                    try:
+                        fut = await reservation.send(
+                            dependencies.topics.messages_raw,
+                            key=recipient_id,
+                            value=Message(
+                                sender_id=sender_id,
+                                recipient_id=recipient_id,
+                                text=serializer.text,
+                                timestamp=timestamp,
+                            ),
+                        )
+                    except Exception as e:
+                        results.append(
+                            {"index": index, "status": "failed", "error": str(e)}
+                        )
+                        continue
+                    results.append({"index": index, "status": "accepted"})
+                    pending.append((index, fut))
+
+            acks = await asyncio.gather(
+                *(fut for _, fut in pending), return_exceptions=True
+            )
+            for (index, _), ack in zip(pending, acks):
+                if isinstance(ack, BaseException):
+                    results[index] = {
+                        "index": index,
+                        "status": "failed",
+                        "error": str(ack),
+                    }
+            dependencies.logger.sampled(
+                logging.INFO,
+                "message batches sent by API",
+                "Batch of %d messages sent by API, %d accepted.",
+                len(items),
+                len(pending),
             )
+            return self.json({"results": results}, status=HTTPStatus.ACCEPTED)
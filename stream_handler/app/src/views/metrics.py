@@ -0,0 +1,141 @@
+from collections.abc import Iterator
+from dataclasses import fields
+from typing import Final
+
+import faust
+from aiohttp.web_request import Request
+from aiohttp.web_response import Response
+from faust.exceptions import ConsumerNotStarted
+
+from ..core.metrics import (
+    METRICS,
+    Gauge,
+    LabelValues,
+    MetricsSensor,
+    StartupSensor,
+    table_key_count,
+)
+from ..core.startup import STARTUP
+from ..dependencies import AppDependencies
+
+PROMETHEUS_CONTENT_TYPE: Final[str] = "text/plain; version=0.0.4"
+
+
+def metrics_view(app: faust.App, dependencies: AppDependencies) -> None:
+    """
+    Регистрация страницы метрик в формате Prometheus.
+
+    Счетчики и гистограммы обновляются агентами по ходу обработки, а
+    показатели (лаг консьюмера, размеры таблиц и индексов) вычисляются
+    только в момент запроса страницы. Здесь же отмечаются этапы запуска
+    воркера (STARTUP).
+    """
+    app.sensors.add(MetricsSensor())
+    app.sensors.add(StartupSensor(STARTUP, dependencies.logger))
+
+    @app.task
+    async def startup_recovery() -> None:
+        """
+        Отметка запуска воркера и завершения восстановления таблиц.
+        """
+        STARTUP.mark("worker_started")
+        # NOTE: событие выставляется после восстановления таблиц, когда
+        # консьюмер возобновляет чтение партиций топиков
+        await app.tables.recovery.completed.wait()
+        STARTUP.mark("tables_recovered")
+
+    def consumer_lag() -> Iterator[tuple[LabelValues, float]]:
+        consumer = app.consumer
+        read_offsets = app.monitor.tp_read_offsets
+        try:
+            assignment = consumer.assignment()
+        except ConsumerNotStarted:
+            return
+        for tp in assignment:
+            highwater = consumer.highwater(tp)
+            read_offset = read_offsets.get(tp)
+            if highwater is None or read_offset is None:
+                continue
+            yield (tp.topic, str(tp.partition)), max(highwater - read_offset - 1, 0)
+
+    def table_keys() -> Iterator[tuple[LabelValues, float]]:
+        for table_field in fields(dependencies.tables):
+            table = getattr(dependencies.tables, table_field.name)
+            yield (table_field.name,), table_key_count(table)
+
+    def blocked_pairs() -> Iterator[tuple[LabelValues, float]]:
+        yield (), len(dependencies.blocked_pairs)
+
+    def admission_in_flight() -> Iterator[tuple[LabelValues, float]]:
+        yield (), dependencies.admission.in_flight
+
+    def admission_limit() -> Iterator[tuple[LabelValues, float]]:
+        yield (), dependencies.admission.limit
+
+    def producer_buffer() -> Iterator[tuple[LabelValues, float]]:
+        yield (), app.producer.buffer.size
+
+    def startup_phases() -> Iterator[tuple[LabelValues, float]]:
+        for phase, seconds in STARTUP.phases.items():
+            yield (phase,), seconds
+
+    METRICS.register(
+        Gauge(
+            "consumer_lag",
+            "Messages between the last read offset and the highwater",
+            ("topic", "partition"),
+            consumer_lag,
+        )
+    )
+    METRICS.register(
+        Gauge("table_keys", "Estimated number of keys in table", ("table",), table_keys)
+    )
+    METRICS.register(
+        Gauge("blocked_pairs", "Pairs in the blocked senders index", (), blocked_pairs)
+    )
+    METRICS.register(
+        Gauge(
+            "admission_in_flight",
+            "Records sent by the HTTP API and not yet acknowledged by the broker",
+            (),
+            admission_in_flight,
+        )
+    )
+    METRICS.register(
+        Gauge(
+            "admission_limit",
+            "In-flight budget of the HTTP API",
+            (),
+            admission_limit,
+        )
+    )
+    METRICS.register(
+        Gauge(
+            "producer_buffer_size",
+            "Records waiting in the producer buffer",
+            (),
+            producer_buffer,
+        )
+    )
+    METRICS.register(
+        Gauge(
+            "startup_phase_seconds",
+            "Seconds from the start of app.main import to each startup phase",
+            ("phase",),
+            startup_phases,
+        )
+    )
+
+    @app.page("/metrics/")
+    class MetricsView(faust.web.View):
+        """
+        Представление для сбора метрик Prometheus.
+        """
+
+        async def get(self, request: Request) -> Response:
+            """
+            Текущие значения метрик в текстовом формате Prometheus.
+            """
+            return self.bytes(
+                METRICS.render().encode(), content_type=PROMETHEUS_CONTENT_TYPE
+            )
@@ -0,0 +1,187 @@
+import asyncio
+import time
+from http import HTTPStatus
+from typing import Final
+
+import aiohttp
+import faust
+import orjson
+from aiohttp.web_request import Request
+from aiohttp.web_response import Response
+from yarl import URL
+
+from ..core.metrics import KEY_ROUTE_READS
+from ..core.types import SenderStats
+from ..core.utils import sender_stats_totals_key
+from ..dependencies import AppDependencies
+from ..services.conditional import make_etag, not_modified_response
+from ..services.sketches import HyperLogLog
+
+STATS_TOTALS_NAMES: Final[tuple[str, ...]] = ("messages", "senders")
+
+
+def partition_totals(totals_table: faust.Table, partition: int) -> dict[str, int]:
+    """
+    Итоги за текущие сутки одной партиции.
+
+    :param totals_table: faust.Table, таблица итогов sender_stats_totals
+    :param partition: int, номер партиции
+
+    :return: dict[str, int], количество сообщений и отправителей
+    """
+    return {
+        name: totals_table[sender_stats_totals_key(partition, name)].now()
+        for name in STATS_TOTALS_NAMES
+    }
+
+
+def stats_view(app: faust.App, dependencies: AppDependencies) -> None:
+    """
+    Регистрация представления суточной статистики отправителей.
+    """
+
+    @app.page("/stats/")
+    class StatsView(faust.web.View):
+        """
+        Представление статистики сообщений за текущие сутки.
+        """
+
+        # NOTE: таблица перераспределена group_by по sender_id на столько же
+        # партиций, сколько у топика сырых сообщений
+        @dependencies.key_router.route(
+            app,
+            "stats",
+            dependencies.tables.sender_stats.table,
+            dependencies.topics.messages_raw,
+            query_param="sender_id",
+        )
+        async def get(self, request: Request) -> Response:
+            """
+            Статистика отправителей за текущие сутки.
+
+            С sender_id - количество сообщений, приблизительное количество
+            уникальных получателей и последние тексты отправителя после
+            цензуры; запрос обрабатывает воркер, владеющий партицией
+            sender_id (см. KeyRouter). Без него - общее количество сообщений
+            и отправителей из итогов по партициям, без обхода таблицы
+            отправителей: итоги своих партиций воркер читает локально, а
+            остальные запрашивает у их владельцев (scope=local).
+            scope=local возвращает итоги только активных партиций воркера.
+
+            ETag - начало суток и количество сообщений: отправителя или
+            общее количество вместе с количеством отправителей.
+            """
+            stats_table = dependencies.tables.sender_stats
+            window_start: float = stats_table.table.window.earliest(time.time())[0]
+            if sender_id := request.query.get("sender_id"):
+                try:
+                    stats: SenderStats = stats_table[sender_id].now()
+                except KeyError:
+                    return self.json(
+                        {"error": "no stats for sender today"},
+                        status=HTTPStatus.NOT_FOUND,
+                    )
+                etag = make_etag(
+                    "stats", sender_id, int(window_start), stats.messages_sent
+                )
+                if response := not_modified_response(self, request, etag):
+                    return response
+                return self.json(
+                    {
+                        "sender_id": sender_id,
+                        "messages_sent": stats.messages_sent,
+                        "recipients_amount": HyperLogLog.loads(
+                            stats.recipients_sketch
+                        ).count(),
+                        "recent_messages": stats.recent_texts,
+                    },
+                    status=HTTPStatus.OK,
+                    headers={"ETag": etag},
+                )
+
+            totals_table = dependencies.tables.sender_stats_totals
+            if request.query.get("scope") == "local":
+                partitions = dependencies.key_router.active_partitions(
+                    app, totals_table.table
+                )
+                return self.json(
+                    {
+                        "scope": "local",
+                        "partitions": {
+                            str(partition): partition_totals(totals_table, partition)
+                            for partition in partitions
+                        },
+                    },
+                    status=HTTPStatus.OK,
+                )
+
+            if (totals := await self.cluster_totals(request)) is None:
+                return self.json(
+                    {"error": "partition owner is unavailable, retry later"},
+                    status=HTTPStatus.SERVICE_UNAVAILABLE,
+                )
+            etag = make_etag(
+                "stats", int(window_start), totals["messages"], totals["senders"]
+            )
+            if response := not_modified_response(self, request, etag):
+                return response
+            return self.json(
+                {
+                    "total_messages": totals["messages"],
+                    "total_unique_senders": totals["senders"],
+                },
+                status=HTTPStatus.OK,
+                headers={"ETag": etag},
+            )
+
+        async def cluster_totals(self, request: Request) -> dict[str, int] | None:
+            """
+            Итоги за сутки по всем партициям кластера.
+
+            Локальные и (при stale=true) standby-партиции читаются из таблицы,
+            остальные - одним запросом scope=local к каждому владельцу.
+
+            :return: dict[str, int] | None, количество сообщений и
+                отправителей или None, если владелец партиции недоступен
+            """
+            router = dependencies.key_router
+            totals_table = dependencies.tables.sender_stats_totals
+            totals = dict.fromkeys(STATS_TOTALS_NAMES, 0)
+            remote: dict[str, list[int]] = {}
+            for partition in range(totals_table.table.partitions):
+                source, owner_url = router.locate_partition(
+                    app, totals_table.table, partition, request
+                )
+                if source == "owner":
+                    remote.setdefault(owner_url, []).append(partition)
+                    continue
+                KEY_ROUTE_READS.inc(1, "stats_totals", source)
+                if source == "unavailable":
+                    return None
+                for name, count in partition_totals(totals_table, partition).items():
+                    totals[name] += count
+
+            target = request.rel_url.with_query({"scope": "local"})
+            responses = await asyncio.gather(
+                *(router.fetch(app, URL(url).join(target)) for url in remote),
+                return_exceptions=True,
+            )
+            for partitions, response in zip(remote.values(), responses):
+                if isinstance(response, (aiohttp.ClientError, asyncio.TimeoutError)):
+                    KEY_ROUTE_READS.inc(len(partitions), "stats_totals", "unavailable")
+                    return None
+                if isinstance(response, BaseException):
+                    raise response
+                body, _content_type, status, _etag = response
+                owned: dict[str, dict[str, int]] = {}
+                if status == HTTPStatus.OK:
+                    owned = orjson.loads(body)["partitions"]
+                for partition in partitions:
+                    # NOTE: назначение партиций изменилось между запросами
+                    if (counts := owned.get(str(partition))) is None:
+                        KEY_ROUTE_READS.inc(1, "stats_totals", "unavailable")
+                        return None
+                    KEY_ROUTE_READS.inc(1, "stats_totals", "owner")
+                    for name in STATS_TOTALS_NAMES:
+                        totals[name] += counts[name]
+            return totals
@@ -1,16 +1,67 @@
 import datetime as dt
+import json
+from collections.abc import Iterator
 from http import HTTPStatus
-from typing import Any
+from itertools import islice
+from typing import Any, Final
 
 import faust
+import orjson
 from aiohttp.web_request import Request
-from aiohttp.web_response import Response
+from aiohttp.web_response import Response, StreamResponse
 from pydantic import ValidationError
 
 from ..core.types import OperationType, UserBlockingRecord
-from ..core.utils import get_serializer_errors
+from ..core.utils import decode_key_cursor, encode_key_cursor, get_serializer_errors
 from ..dependencies import AppDependencies
 from ..schemas import BlockUserSerializer
+from ..services.blocking import UserIdsIndex
+from ..services.conditional import make_etag, not_modified_response
+
+
+USERS_PAGE_DEFAULT_LIMIT: Final[int] = 100
+USERS_PAGE_MAX_LIMIT: Final[int] = 1000
+USERS_STREAM_CHUNK_SIZE: Final[int] = 500
+
+
+def user_record(user_id: str, blocked: dict | None, summary: bool) -> dict[str, Any]:
+    """
+    Запись о блокировках пользователя для списка пользователей.
+
+    :param user_id: str, идентификатор пользователя
+    :param blocked: dict | None, заблокированные пользователем пользователи
+    :param summary: bool, вернуть только количество блокировок
+
+    :return: dict[str, Any], запись для ответа
+    """
+    if summary:
+        return {"user_id": user_id, "total_blocked": len(blocked or {})}
+    return {"user_id": user_id, "blocked_users": blocked}
+
+
+def iter_users(
+    blocked_users: faust.Table, user_ids: UserIdsIndex, summary: bool
+) -> Iterator[dict[str, Any]]:
+    """
+    Ленивый обход таблицы блокировок в порядке идентификаторов.
+
+    Идентификаторы читаются частями по USERS_STREAM_CHUNK_SIZE, и каждая
+    часть продолжает обход с последнего прочитанного идентификатора, как
+    курсор страницы. Между частями можно отдавать управление event loop:
+    агент может изменить таблицу и индекс, а снимок всех ключей не нужен.
+
+    :param blocked_users: faust.Table, таблица блокировок пользователей
+    :param user_ids: UserIdsIndex, упорядоченные идентификаторы пользователей
+    :param summary: bool, возвращать только количество блокировок
+
+    :return: Iterator[dict[str, Any]], записи о блокировках пользователей
+    """
+    after: str | None = None
+    while chunk := list(islice(user_ids.after(after), USERS_STREAM_CHUNK_SIZE)):
+        for user_id in chunk:
+            if (blocked := blocked_users.get(user_id)) is not None:
+                yield user_record(user_id, blocked, summary)
+        after = chunk[-1]
 
 
 def users_view(app: faust.App, dependencies: AppDependencies) -> None:
@@ -31,16 +82,25 @@ def users_view(app: faust.App, dependencies: AppDependencies) -> None:
                 return self.json(
                     {"errors": get_serializer_errors(e)}, status=HTTPStatus.BAD_REQUEST
                 )
-            await dependencies.topics.blocked_users.send(
-                key=str(serializer.user_id),
-                value=UserBlockingRecord(
-                    user_id=str(serializer.user_id),
-                    blocked_id=str(serializer.blocked_id),
-                    date_blocked=dt.datetime.now(dt.timezone.utc).isoformat(),
-                    comment=serializer.comment,
-                    operation_type=serializer.operation_type,
-                ),
-            )
+            reservation = dependencies.admission.reserve(1, "block_user")
+            if reservation is None:
+                return self.json(
+                    {"error": "too many requests in flight, retry later"},
+                    status=HTTPStatus.TOO_MANY_REQUESTS,
+                    headers=dependencies.admission.retry_headers,
+                )
+            with reservation:
+                await reservation.send(
+                    dependencies.topics.blocked_users,
+                    key=str(serializer.user_id),
+                    value=UserBlockingRecord(
+                        user_id=str(serializer.user_id),
+                        blocked_id=str(serializer.blocked_id),
+                        date_blocked=dt.datetime.now(dt.timezone.utc).isoformat(),
+                        comment=serializer.comment,
+                        operation_type=serializer.operation_type,
+                    ),
+                )
             operation = (
                 "block" if serializer.operation_type == OperationType.ADD else "unblock"
             )
@@ -54,30 +114,139 @@ def users_view(app: faust.App, dependencies: AppDependencies) -> None:
 
     @app.page("/users/")
     class UsersListView(faust.web.View):
-        async def get(self, request: Request) -> Response:
+        async def get(self, request: Request) -> Response | StreamResponse:
             """
-            Получение списка всех пользователей с блокировками.
+            Получение списка пользователей с блокировками.
+
+            По умолчанию возвращается страница из limit пользователей в порядке
+            user_id (см. UserIdsIndex) и курсор следующей страницы - последний
+            возвращенный user_id, с которого продолжается обход. format=ndjson отдает
+            всех пользователей потоком, по одной строке JSON на пользователя.
+            mode=summary заменяет данные о блокировках их количеством.
+
+            ETag страницы - счетчики изменений блокировок по партициям и
+            параметры страницы. Поток NDJSON читает таблицу между записями
+            частей ответа, поэтому отдается без ETag.
             """
+            summary = request.query.get("mode") == "summary"
+            if request.query.get("format") == "ndjson":
+                return await self.stream_ndjson(
+                    request,
+                    iter_users(
+                        dependencies.tables.blocked_users,
+                        dependencies.user_ids,
+                        summary,
+                    ),
+                )
+
+            try:
+                limit = int(request.query.get("limit", USERS_PAGE_DEFAULT_LIMIT))
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return self.json(
+                    {"error": "limit must be a positive integer"},
+                    status=HTTPStatus.BAD_REQUEST,
+                )
+            limit = min(limit, USERS_PAGE_MAX_LIMIT)
+            after: str | None = None
+            if cursor := request.query.get("cursor"):
+                try:
+                    after = decode_key_cursor(cursor)
+                except ValueError as e:
+                    return self.json({"error": str(e)}, status=HTTPStatus.BAD_REQUEST)
+            blocked_users = dependencies.tables.blocked_users
+            changes = dependencies.tables.blocked_users_changes
+            etag = make_etag(
+                "users",
+                *(changes[partition] for partition in range(changes.partitions)),
+                int(summary),
+                limit,
+                cursor or "",
+            )
+            if response := not_modified_response(self, request, etag):
+                return response
+            page: list[dict[str, Any]] = []
+            for user_id in dependencies.user_ids.after(after):
+                if (blocked := blocked_users.get(user_id)) is None:
+                    continue
+                page.append(user_record(user_id, blocked, summary))
+                if len(page) == limit:
+                    break
             return self.json(
-                dict(dependencies.tables.blocked_users.items()), status=HTTPStatus.OK
+                {
+                    "users": page,
+                    "next_cursor": (
+                        encode_key_cursor(page[-1]["user_id"])
+                        if len(page) == limit
+                        else None
+                    ),
+                },
+                status=HTTPStatus.OK,
+                headers={"ETag": etag},
+            )
+
+        async def stream_ndjson(
+            self, request: Request, users: Iterator[dict[str, Any]]
+        ) -> StreamResponse:
+            """
+            Потоковая выдача пользователей в формате NDJSON частями.
+            """
+            response = StreamResponse(
+                status=HTTPStatus.OK,
+                headers={"Content-Type": "application/x-ndjson"},
             )
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            while chunk := list(islice(users, USERS_STREAM_CHUNK_SIZE)):
+                await response.write(
+                    "".join(json.dumps(record) + "\n" for record in chunk).encode()
+                )
+            await response.write_eof()
+            return response
 
     @app.page("/users/{user_id}/")
     class UserDetailView(faust.web.View):
+        @dependencies.key_router.route(
+            app,
+            "user_detail",
+            dependencies.tables.blocked_users,
+            dependencies.topics.blocked_users,
+            match_info="user_id",
+        )
         async def get(self, request: Request, user_id: str) -> Response:
             """
             Получение информации о блокировках конкретного пользователя.
+
+            Запрос обрабатывает воркер, владеющий партицией user_id
+            (см. KeyRouter). ETag - счетчик изменений блокировок пользователя;
+            сериализованный ответ хранится до следующего изменения.
             """
             if user_id not in dependencies.tables.blocked_users.keys():
                 return self.json(
                     {"error": "user not found"}, status=HTTPStatus.NOT_FOUND
                 )
-            blocked_users: dict = dependencies.tables.blocked_users.get(user_id)
-            return self.json(
-                {
-                    "user_id": user_id,
-                    "blocked_users": blocked_users,
-                    "total_blocked": len(blocked_users or {}),
-                },
+            version: int = dependencies.tables.blocked_users_versions[user_id]
+            etag = make_etag("user", user_id, version)
+            if response := not_modified_response(self, request, etag):
+                return response
+
+            def build() -> bytes:
+                blocked_users: dict = dependencies.tables.blocked_users.get(user_id)
+                return orjson.dumps(
+                    {
+                        "user_id": user_id,
+                        "blocked_users": blocked_users,
+                        "total_blocked": len(blocked_users or {}),
+                    }
+                )
+
+            body = dependencies.response_cache.get_or_build(
+                ("user", user_id), version, build
+            )
+            return self.bytes(
+                body,
+                content_type="application/json",
                 status=HTTPStatus.OK,
+                headers={"ETag": etag},
             )
@@ -0,0 +1,16 @@
+import subprocess
+from pathlib import Path
+
+RESULTS_DIR: Path = Path(__file__).parent / "results"
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
@@ -0,0 +1,357 @@
+"""
+Бенчмарк агентов censor_agent, store_filtered_messages и process_users_blocking.
+
+Запуск из каталога stream_handler:
+    python -m benchmarks.agents --messages 20000 --text-words 20 --vocabulary 500
+    python -m benchmarks.agents --agent censor_agent --hit-rate 0.5
+    python -m benchmarks.agents --compare benchmarks/results/agents-1a2b3c4.json
+    CENSOR_PIPELINE=fused python -m benchmarks.agents
+
+Kafka не требуется: функция агента запускается на потоке канала в памяти
+(test_context() faust требует, чтобы агент выдавал события), таблицы
+используют хранилище memory://, а отправка в топик отфильтрованных
+сообщений подтверждается через latency-ms миллисекунд. Записи changelog таблиц остаются в буфере продюсера и входят
+в пиковую память.
+
+Словарь для цензуры загружается через агент update_banned_words в пустую
+таблицу; если агент не применяет изменения, бенчмарк завершается ошибкой.
+
+При CENSOR_PIPELINE=fused вместо censor_agent и store_filtered_messages
+измеряется censor_and_store_messages.
+
+Для каждого агента выводит пропускную способность, p50/p99 задержки от
+подачи события до его подтверждения агентом (сенсор faust, агенты не
+выдают события) и пиковую память (tracemalloc).
+Трассировка памяти замедляет обработку, поэтому сравнивать стоит запуски
+с одинаковыми флагами; --no-memory отключает ее.
+Результаты сохраняются в benchmarks/results/agents-<коммит>.json, с ними
+можно сравнить следующий запуск через --compare.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import faust
+from faust.types import Message as TopicMessage
+
+os.environ.setdefault("DATA_STORE", "memory://")
+
+from app.main import app  # noqa: E402
+from app.src.core.const import BANNED_WORDS_KEY, DEFAULT_BANNED_WORDS  # noqa: E402
+from app.src.core.types import (  # noqa: E402
+    BannedWord,
+    Message,
+    OperationType,
+    UserBlockingRecord,
+)
+from app.src.core.utils import banned_words_version  # noqa: E402
+from app.src.dependencies import DEPENDENCIES  # noqa: E402
+
+from . import RESULTS_DIR, current_commit  # noqa: E402
+from .censor_batch import FakeTopic  # noqa: E402
+
+# NOTE: набор агентов зависит от CENSOR_PIPELINE
+AGENTS: tuple[str, ...] = tuple(
+    agent_name
+    for agent_name in (
+        "censor_agent",
+        "store_filtered_messages",
+        "censor_and_store_messages",
+        "process_users_blocking",
+    )
+    if f"app.src.agents.{agent_name}" in app.agents
+)
+PLAIN_WORDS: tuple[str, ...] = ("hello", "world", "kafka", "stream", "faust", "message")
+
+
+def make_vocabulary(size: int, rnd: random.Random) -> list[str]:
+    return [
+        "".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 10)))
+        for _ in range(size)
+    ]
+
+
+def make_messages(args: argparse.Namespace, vocabulary: list[str]) -> list[Message]:
+    rnd = random.Random(args.seed)
+    messages = []
+    for _ in range(args.messages):
+        words = rnd.choices(PLAIN_WORDS, k=args.text_words)
+        if vocabulary and rnd.random() < args.hit_rate:
+            words[rnd.randrange(len(words))] = rnd.choice(vocabulary)
+        messages.append(
+            Message(
+                sender_id=str(rnd.randint(1, args.users)),
+                recipient_id=str(rnd.randint(1, args.users)),
+                text=" ".join(words),
+                timestamp=int(time.time()),
+            )
+        )
+    return messages
+
+
+def make_blocking_records(args: argparse.Namespace) -> list[UserBlockingRecord]:
+    rnd = random.Random(args.seed)
+    date_blocked = datetime.now(timezone.utc).isoformat()
+    return [
+        UserBlockingRecord(
+            user_id=str(rnd.randint(1, args.users)),
+            blocked_id=str(rnd.randint(1, args.users)),
+            date_blocked=date_blocked,
+            operation_type=(
+                OperationType.REMOVE if rnd.random() < 0.2 else OperationType.ADD
+            ),
+        )
+        for _ in range(args.messages)
+    ]
+
+
+def to_message(key: str, value: Any, offset: int) -> TopicMessage:
+    """
+    Запись топика для канала в памяти, как в AgentTestWrapper.to_message.
+    """
+    return TopicMessage(
+        topic="benchmark",
+        partition=0,
+        offset=offset,
+        timestamp=time.time(),
+        timestamp_type=0,
+        headers=None,
+        key=key,
+        value=value,
+        checksum=b"",
+        generation_id=app.consumer_generation_id,
+    )
+
+
+class ProcessedSensor(faust.Sensor):
+    """
+    Сенсор, вызывающий on_processed после обработки события агентом.
+
+    Stream вызывает on_stream_event_out при подтверждении события: после
+    его обработки, а у censor_agent - после доставки пачки в топик.
+    """
+
+    def __init__(self, on_processed: Callable[[], None], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.on_processed = on_processed
+
+    def on_stream_event_out(self, tp, offset, stream, event, state=None) -> None:
+        self.on_processed()
+
+
+async def drive(
+    agent_name: str,
+    events: list[tuple[str, Any]],
+    in_flight: int,
+    trace_memory: bool,
+) -> dict[str, float | None]:
+    """
+    Подача событий агенту и сбор задержек.
+
+    В обработке одновременно находится не более in_flight событий, как у
+    консьюмера с ограниченным буфером. Задержка события - время от подачи
+    в канал до его подтверждения (ProcessedSensor). Агенты подтверждают
+    события в порядке поступления, поэтому i-е подтверждение соответствует
+    i-му событию.
+    """
+    agent = app.agents[f"app.src.agents.{agent_name}"]
+    put_times: list[float] = []
+    done_times: list[float] = []
+    finished = asyncio.Event()
+    budget = asyncio.Semaphore(in_flight)
+
+    def on_processed() -> None:
+        done_times.append(time.perf_counter())
+        budget.release()
+        if len(done_times) == len(events):
+            finished.set()
+
+    sensor = ProcessedSensor(on_processed)
+    if trace_memory:
+        tracemalloc.start()
+    app.flow_control.resume()
+    stream = agent.stream(channel=app.channel())
+    channel = stream.channel
+    actor = asyncio.ensure_future(agent.fun(stream))
+    # NOTE: остановка агента будит цикл подачи, ошибка агента поднимается ниже
+    actor.add_done_callback(lambda _: (finished.set(), budget.release()))
+    app.sensors.add(sensor)
+    try:
+        started = time.perf_counter()
+        for offset, (key, value) in enumerate(events):
+            await budget.acquire()
+            if actor.done():
+                break
+            put_times.append(time.perf_counter())
+            await channel.put(await channel.decode(to_message(key, value, offset)))
+        await finished.wait()
+        elapsed = time.perf_counter() - started
+        if actor.done():
+            actor.result()
+            raise RuntimeError(f"{agent_name} stopped before processing all events")
+    finally:
+        app.sensors.remove(sensor)
+        actor.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await actor
+    peak_memory_mb = None
+    if trace_memory:
+        peak_memory_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    latencies = [done - put for put, done in zip(put_times, done_times)]
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        "events": len(events),
+        "events_per_sec": len(events) / elapsed,
+        "p50_ms": percentiles[49] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "peak_memory_mb": peak_memory_mb,
+    }
+
+
+async def load_vocabulary(vocabulary: list[str]) -> None:
+    """
+    Загрузка словаря через агент update_banned_words в пустую таблицу.
+
+    Заодно проверяет, что агент применяет изменения к таблице без версии:
+    итоговый словарь совпадает с vocabulary, а версия равна числу изменений.
+    """
+    table = DEPENDENCIES.tables.banned_words
+    table.data.clear()
+    words = set(vocabulary)
+    events = [BannedWord(word=word, operation_type=OperationType.ADD) for word in words]
+    events += [
+        BannedWord(word=word, operation_type=OperationType.REMOVE)
+        for word in DEFAULT_BANNED_WORDS - words
+    ]
+    agent = app.agents["app.src.agents.update_banned_words"]
+    # NOTE: changelog глобальной таблицы партиционируется продюсером, которому
+    # нужны метаданные кластера; без Kafka записи changelog отбрасываются
+    table.send_changelog = lambda partition, *args, **kwargs: SimpleNamespace(
+        message=SimpleNamespace(partition=partition or 0)
+    )
+    try:
+        async with agent.test_context() as test_agent:
+            for event in events:
+                # NOTE: агент выдает событие только после записи в таблицу
+                try:
+                    await asyncio.wait_for(test_agent.put(event), timeout=1.0)
+                except asyncio.TimeoutError:
+                    raise RuntimeError(
+                        f"update_banned_words did not apply {event.word!r}"
+                    ) from None
+    finally:
+        del table.send_changelog
+    if set(table.data.get(BANNED_WORDS_KEY, ())) != words or banned_words_version(
+        table
+    ) != len(events):
+        raise RuntimeError("update_banned_words did not apply the vocabulary")
+
+
+def prepare_censor_agent(args: argparse.Namespace) -> list[tuple[str, Any]]:
+    vocabulary = make_vocabulary(args.vocabulary, random.Random(args.seed))
+    app.loop.run_until_complete(load_vocabulary(vocabulary))
+    DEPENDENCIES.topics.messages_filtered = FakeTopic(args.latency_ms / 1000)
+    return [(msg.recipient_id, msg) for msg in make_messages(args, vocabulary)]
+
+
+def prepare_store_filtered_messages(args: argparse.Namespace) -> list[tuple[str, Any]]:
+    return [(msg.recipient_id, msg) for msg in make_messages(args, [])]
+
+
+def prepare_process_users_blocking(args: argparse.Namespace) -> list[tuple[str, Any]]:
+    return [(record.user_id, record) for record in make_blocking_records(args)]
+
+
+PREPARE: dict[str, Callable[[argparse.Namespace], list[tuple[str, Any]]]] = {
+    "censor_agent": prepare_censor_agent,
+    "store_filtered_messages": prepare_store_filtered_messages,
+    "censor_and_store_messages": prepare_censor_agent,
+    "process_users_blocking": prepare_process_users_blocking,
+}
+
+
+def print_results(results: dict[str, dict], baseline: dict[str, dict]) -> None:
+    columns = ("events_per_sec", "p50_ms", "p99_ms", "peak_memory_mb")
+    print(f"{'agent':>25} | " + " | ".join(f"{column:>16}" for column in columns))
+    for agent_name, result in results.items():
+        cells = []
+        for column in columns:
+            if result[column] is None:
+                cells.append(f"{'-':>16}")
+                continue
+            cell = f"{result[column]:.2f}"
+            previous = baseline.get(agent_name, {}).get(column)
+            if previous:
+                cell += f" ({(result[column] - previous) / previous:+.0%})"
+            cells.append(f"{cell:>16}")
+        print(f"{agent_name:>25} | " + " | ".join(cells))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--agent", choices=AGENTS, action="append")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--text-words", type=int, default=20)
+    parser.add_argument("--vocabulary", type=int, default=500)
+    parser.add_argument("--hit-rate", type=float, default=0.1)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--in-flight", type=int, default=128)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    DEPENDENCIES.logger.disabled = True
+    results: dict[str, dict] = {}
+    for agent_name in args.agent or AGENTS:
+        events = PREPARE[agent_name](args)
+        results[agent_name] = app.loop.run_until_complete(
+            drive(agent_name, events, args.in_flight, not args.no_memory)
+        )
+
+    baseline = json.loads(args.compare.read_text())["results"] if args.compare else {}
+    print_results(results, baseline)
+
+    commit = current_commit()
+    output = args.output or RESULTS_DIR / f"agents-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    params = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("compare", "output", "agent")
+    }
+    output.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "date": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "params": params,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Бенчмарк пакетной цензуры сообщений (censor_agent).
+
+Запуск из каталога stream_handler:
+    python -m benchmarks.censor_batch --messages 5000 --latency-ms 2
+
+Брокер эмулируется: каждая отправка подтверждается через latency-ms
+миллисекунд, как если бы это был сетевой round trip до Kafka.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from app.src.agents import censor_messages_batch
+from app.src.core.const import DEFAULT_BANNED_WORDS
+from app.src.core.logger import SchedulerLogger
+from app.src.core.types import Message
+from app.src.dependencies import AppDependencies
+
+BATCH_SIZES: tuple[int, ...] = (1, 64, 512)
+WORDS: tuple[str, ...] = ("hello", "world", "kafka", "stream", "faust", "message")
+
+
+class FakeTopic:
+    """
+    Топик, подтверждающий отправку через фиксированную задержку.
+    """
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.sent = 0
+
+    async def send(self, value: Message, **kwargs) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        loop.call_later(self.latency, fut.set_result, None)
+        self.sent += 1
+        return fut
+
+
+def make_messages(amount: int, seed: int = 42) -> list[Message]:
+    rnd = random.Random(seed)
+    vocabulary = WORDS + tuple(DEFAULT_BANNED_WORDS)
+    return [
+        Message(
+            sender_id=str(rnd.randint(1, 100)),
+            recipient_id=str(rnd.randint(1, 100)),
+            text=" ".join(rnd.choices(vocabulary, k=12)),
+            timestamp=int(time.time()),
+        )
+        for _ in range(amount)
+    ]
+
+
+async def run(batch_size: int, amount: int, latency: float) -> float:
+    logger = SchedulerLogger("benchmark")
+    logger.disabled = True
+    dependencies = AppDependencies(
+        tables=SimpleNamespace(banned_words={"global": set(DEFAULT_BANNED_WORDS)}),
+        topics=SimpleNamespace(messages_filtered=FakeTopic(latency)),
+        logger=logger,
+    )
+    messages = make_messages(amount)
+    started = time.perf_counter()
+    for i in range(0, amount, batch_size):
+        await censor_messages_batch(messages[i : i + batch_size], dependencies)
+    return amount / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'batch size':>10} | {'messages/sec':>12}")
+    for batch_size in BATCH_SIZES:
+        rate = asyncio.run(run(batch_size, args.messages, args.latency_ms / 1000))
+        print(f"{batch_size:>10} | {rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
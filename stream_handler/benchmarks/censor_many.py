@@ -0,0 +1,109 @@
+"""
+Микро-бенчмарк censor_many против посимвольной маскировки censor_text.
+
+Запуск из каталога stream_handler:
+    python -m benchmarks.censor_many --vocabulary 1000
+
+Базовая линия повторяет прежнюю реализацию WordCensor.censor_text:
+поиск по text.lower() без нормализации, list(text) и посимвольная
+перезапись для каждого совпадения. Сценарий с кириллицей показывает
+стоимость нормализации для текстов не из ASCII.
+"""
+
+import argparse
+import random
+import string
+import timeit
+
+import ahocorasick
+
+from app.src.services.censorship import WordCensor
+
+MASK_CHAR: str = "*"
+
+
+def legacy_censor_text(text: str, automaton: ahocorasick.Automaton) -> str:
+    result = list(text)
+    for end_index, original_word in automaton.iter(text.lower()):
+        start = end_index - len(original_word) + 1
+        for i in range(start, end_index + 1):
+            if result[i] not in (" ", "\n", "\t"):
+                result[i] = MASK_CHAR
+    return "".join(result)
+
+
+def make_legacy_automaton(vocabulary: list[str]) -> ahocorasick.Automaton:
+    automaton = ahocorasick.Automaton()
+    for word in vocabulary:
+        automaton.add_word(word.lower(), word.lower())
+    automaton.make_automaton()
+    return automaton
+
+
+def make_vocabulary(size: int, rnd: random.Random) -> list[str]:
+    return [
+        "".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 9)))
+        for _ in range(size)
+    ]
+
+
+def make_texts(
+    amount: int,
+    words_per_text: int,
+    hit_rate: float,
+    vocabulary: list[str],
+    rnd: random.Random,
+    filler: tuple[str, ...] = ("hello", "kafka", "stream", "message", "world", "faust"),
+) -> list[str]:
+    return [
+        " ".join(
+            rnd.choice(vocabulary) if rnd.random() < hit_rate else rnd.choice(filler)
+            for _ in range(words_per_text)
+        )
+        for _ in range(amount)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vocabulary", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    vocabulary = make_vocabulary(args.vocabulary, rnd)
+    censor = WordCensor(mask_char=MASK_CHAR)
+    censor.build_automaton(set(vocabulary), version=1)
+    automaton = make_legacy_automaton(vocabulary)
+
+    workloads = {
+        "short chat messages": make_texts(args.batch, 8, 0.05, vocabulary, rnd),
+        "long texts, many hits": make_texts(args.batch // 8, 400, 0.4, vocabulary, rnd),
+        "cyrillic chat messages": make_texts(
+            args.batch,
+            8,
+            0.05,
+            vocabulary,
+            rnd,
+            filler=("привет", "как", "дела", "сообщение", "поток", "мир"),
+        ),
+    }
+    print(f"{'workload':<24} | {'legacy, ms':>10} | {'censor_many, ms':>15} | speedup")
+    for name, texts in workloads.items():
+        assert [legacy_censor_text(t, automaton) for t in texts] == censor.censor_many(
+            texts
+        )
+        legacy = timeit.timeit(
+            lambda: [legacy_censor_text(t, automaton) for t in texts],
+            number=args.repeat,
+        )
+        bulk = timeit.timeit(lambda: censor.censor_many(texts), number=args.repeat)
+        print(
+            f"{name:<24} | {legacy / args.repeat * 1000:>10.2f} | "
+            f"{bulk / args.repeat * 1000:>15.2f} | {legacy / bulk:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
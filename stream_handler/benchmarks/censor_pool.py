@@ -0,0 +1,116 @@
+"""
+Бенчмарк масштабирования censor_agent по размеру пула процессов.
+
+Запуск из каталога stream_handler:
+    python -m benchmarks.censor_pool --sizes 1 2 4 --messages 20000
+
+Для каждого CENSOR_POOL_SIZE запускается отдельный процесс с
+CENSOR_EXECUTOR=process, который прогоняет censor_agent так же, как
+benchmarks.agents (канал в памяти, отправка подтверждается через latency-ms
+миллисекунд). Сначала подается прогревочная нагрузка - по пачке на процесс
+пула, чтобы запуск процессов и построение автоматов не входили в замер.
+Выводит события/сек, ускорение относительно первого размера, число ядер
+(прирост возможен, только пока размер пула не больше числа ядер) и
+наибольшее число пачек, одновременно отданных пулу на цензуру.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+def child(args: argparse.Namespace) -> None:
+    """
+    Один размер пула: результат выводится в stdout одной строкой JSON.
+    """
+    from .agents import DEPENDENCIES, app, drive, prepare_censor_agent
+    from app.src.core.config import settings
+    from app.src.services.censor_pool import CensorPool
+
+    DEPENDENCIES.logger.disabled = True
+    jobs = {"running": 0, "max": 0}
+    censor_many = CensorPool.censor_many
+
+    async def count_jobs(self: CensorPool, *args, **kwargs) -> list[str]:
+        jobs["running"] += 1
+        jobs["max"] = max(jobs["max"], jobs["running"])
+        try:
+            return await censor_many(self, *args, **kwargs)
+        finally:
+            jobs["running"] -= 1
+
+    # NOTE: счетчик пачек, одновременно отданных пулу, показывает, что
+    # конвейер агента загружает все процессы пула
+    CensorPool.censor_many = count_jobs
+    params = argparse.Namespace(
+        messages=args.messages,
+        text_words=args.text_words,
+        vocabulary=args.vocabulary,
+        hit_rate=0.1,
+        users=1000,
+        latency_ms=args.latency_ms,
+        seed=42,
+    )
+    events = prepare_censor_agent(params)
+    warmup = events[: settings.censor_batch_size * settings.censor_pool_size]
+    app.loop.run_until_complete(
+        drive("censor_agent", warmup, args.in_flight, trace_memory=False)
+    )
+    result = app.loop.run_until_complete(
+        drive("censor_agent", events, args.in_flight, trace_memory=False)
+    )
+    print(json.dumps({**result, "max_pool_jobs": jobs["max"]}))
+
+
+def run(size: int, args: argparse.Namespace) -> dict[str, float]:
+    env = {
+        **os.environ,
+        "CENSOR_EXECUTOR": "process",
+        "CENSOR_PIPELINE": "topic",
+        "CENSOR_POOL_SIZE": str(size),
+        "DATA_STORE": "memory://",
+    }
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.censor_pool", "--child", *sys.argv[1:]],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--text-words", type=int, default=200)
+    parser.add_argument("--vocabulary", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--in-flight", type=int, default=1024)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+        return
+
+    print(f"cpu cores: {os.cpu_count()}")
+    print(
+        f"{'pool size':>9} | {'events/sec':>10} | {'speedup':>7} | "
+        f"{'p99_ms':>8} | {'max in flight':>13}"
+    )
+    baseline = None
+    for size in args.sizes:
+        result = run(size, args)
+        baseline = baseline or result["events_per_sec"]
+        print(
+            f"{size:>9} | {result['events_per_sec']:>10.0f} | "
+            f"{result['events_per_sec'] / baseline:>6.2f}x | {result['p99_ms']:>8.1f} | "
+            f"{result['max_pool_jobs']:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Бенчмарк кодеков записей Message, UserBlockingRecord и BannedWord.
+
+Запуск из каталога stream_handler:
+    python -m benchmarks.codecs --number 50000
+
+Для каждого типа записи и кодека выводит скорость кодирования и
+декодирования (записей/сек) и размер записи на проводе в байтах.
+Базовая линия - стандартный модуль json.
+"""
+
+import argparse
+import json
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+import faust
+
+from app.src.core.codecs import MsgpackCodec, OrjsonCodec
+from app.src.core.types import BannedWord, Message, OperationType, UserBlockingRecord
+
+Codec = tuple[Callable[[Any], bytes], Callable[[bytes], Any]]
+
+CODECS: dict[str, Codec] = {
+    "json (stdlib)": (lambda obj: json.dumps(obj).encode(), json.loads),
+    "orjson": (OrjsonCodec().dumps, OrjsonCodec().loads),
+    "msgpack": (MsgpackCodec().dumps, MsgpackCodec().loads),
+}
+
+RECORDS: dict[str, faust.Record] = {
+    "Message": Message(
+        sender_id="12345",
+        recipient_id="67890",
+        text="Hello! This is a regular chat message with a *** word inside.",
+        timestamp=1760000000,
+    ),
+    "UserBlockingRecord": UserBlockingRecord(
+        user_id="12345",
+        blocked_id="67890",
+        date_blocked="2025-10-09T08:53:20+00:00",
+        operation_type=OperationType.ADD,
+        comment="spam",
+    ),
+    "BannedWord": BannedWord(word="badword", operation_type=OperationType.ADD),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(
+        f"{'record':<20} | {'codec':<14} | {'encode/sec':>11} | "
+        f"{'decode/sec':>11} | {'bytes':>5}"
+    )
+    for record_name, record in RECORDS.items():
+        payload = record.to_representation()
+        for codec_name, (dumps, loads) in CODECS.items():
+            raw = dumps(payload)
+            assert loads(raw) == json.loads(json.dumps(payload))
+            encode = timeit.timeit(lambda: dumps(payload), number=args.number)
+            decode = timeit.timeit(lambda: loads(raw), number=args.number)
+            print(
+                f"{record_name:<20} | {codec_name:<14} | "
+                f"{args.number / encode:>11.0f} | {args.number / decode:>11.0f} | "
+                f"{len(raw):>5}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Бенчмарк памяти на одно сообщение во входящих (таблица messages_filtered).
+
+Запуск из каталога stream_handler:
+    python -m benchmarks.inbox_memory --messages 100000
+    python -m benchmarks.inbox_memory --save-dictionary inbox.zdict
+
+Сравнивает прежнее значение записи (Message, как его держит хранилище
+memory:// и пишет в changelog кодек json таблицы) с компактной записью
+InboxCodec: без сжатия, со сжатием zstd и со сжатием zstd по словарю,
+обученному на отдельной выборке текстов. Для каждого варианта выводит байты
+на сообщение в changelog и в памяти процесса (tracemalloc): только значение
+записи и запись в оконной таблице messages_filtered целиком - значение, ключ
+получателя с порядковым номером, ключ окна и учет истечения окон faust
+(_partition_timestamp_keys и _partition_timestamps), которые хранятся для
+каждой записи. Таблица использует хранилище memory://, записи changelog
+отбрасываются. --save-dictionary сохраняет обученный словарь для
+INBOX_ZSTD_DICTIONARY.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import tracemalloc
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from faker import Faker
+
+os.environ.setdefault("DATA_STORE", "memory://")
+
+from app.main import app  # noqa: E402, F401
+from app.src.core.types import InboxCompression, Message  # noqa: E402
+from app.src.core.utils import inbox_entry_key  # noqa: E402
+from app.src.dependencies import DEPENDENCIES  # noqa: E402
+from app.src.services import inbox  # noqa: E402
+from app.src.services.inbox import InboxCodec  # noqa: E402
+
+
+def make_messages(amount: int, users: int, seed: int) -> list[Message]:
+    rnd = random.Random(seed)
+    fake = Faker()
+    fake.seed_instance(seed)
+    return [
+        Message(
+            sender_id=str(rnd.randint(1, users)),
+            recipient_id=str(rnd.randint(1, users)),
+            text=fake.sentence(nb_words=rnd.randint(3, 20)),
+            timestamp=1760000000 + index,
+        )
+        for index in range(amount)
+    ]
+
+
+def measure(
+    messages: list[Message],
+    make_value: Callable[[Message], Any],
+    changelog_size: Callable[[Any], int],
+) -> tuple[float, float]:
+    """
+    Байты на сообщение в памяти и в changelog.
+
+    Значения создаются заново из полей сообщения, как при чтении из топика,
+    поэтому строки не разделяются между записями.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    values = [make_value(msg) for msg in messages]
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    allocated -= values.__sizeof__()  # NOTE: сам список в хранилище не входит
+    on_wire = sum(changelog_size(value) for value in values)
+    return allocated / len(messages), on_wire / len(messages)
+
+
+def measure_table(
+    messages: list[Message], make_value: Callable[[Message], Any]
+) -> float:
+    """
+    Байты на сообщение в оконной таблице messages_filtered.
+
+    Записи пишутся так же, как в store_message: ключ получателя с порядковым
+    номером в окне текущих суток. В замер входят значение, ключ, ключ окна и
+    учет истечения окон, который faust ведет для каждой записи.
+    """
+    table = DEPENDENCIES.tables.messages_filtered.table
+    table.data.clear()
+    table._partition_timestamp_keys.clear()
+    table._partition_timestamps.clear()
+    # NOTE: вне агента нет текущего события, которое задает партицию записи;
+    # без Kafka записи changelog отбрасываются
+    table.partition_for_key = lambda key: 0
+    table.send_changelog = lambda partition, *args, **kwargs: SimpleNamespace(
+        message=SimpleNamespace(partition=partition)
+    )
+    heads: dict[str, int] = {}
+    try:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for msg in messages:
+            sequence = heads.get(msg.recipient_id, 0)
+            table._set_windowed(
+                inbox_entry_key(msg.recipient_id, sequence),
+                make_value(msg),
+                msg.timestamp,
+            )
+            heads[msg.recipient_id] = sequence + 1
+        allocated = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+    finally:
+        del table.partition_for_key, table.send_changelog
+        table.data.clear()
+        table._partition_timestamp_keys.clear()
+        table._partition_timestamps.clear()
+    # NOTE: счетчики-головы хранятся в отдельной таблице, а не на сообщение
+    allocated -= heads.__sizeof__()
+    return allocated / len(messages)
+
+
+def record_value(msg: Message) -> Message:
+    return Message(
+        sender_id="".join(msg.sender_id),
+        recipient_id="".join(msg.recipient_id),
+        text="".join(msg.text),
+        timestamp=msg.timestamp,
+    )
+
+
+def encode_entry(codec: InboxCodec, msg: Message) -> bytes:
+    return codec.encode(msg, msg.timestamp)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--dictionary-size", type=int, default=16 * 1024)
+    parser.add_argument("--dictionary-samples", type=int, default=20_000)
+    parser.add_argument("--min-text-bytes", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save-dictionary", type=Path)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages, args.users, args.seed)
+    variants: dict[str, tuple[Callable, Callable]] = {
+        "Message (before)": (
+            record_value,
+            lambda value: len(value.dumps(serializer="json")),
+        ),
+    }
+    codecs: dict[str, InboxCodec] = {"compact": InboxCodec()}
+    if (zstandard := inbox.load_zstandard()) is None:
+        print("zstandard is not installed, zstd variants skipped")
+    else:
+        samples = make_messages(args.dictionary_samples, args.users, args.seed + 1)
+        dictionary = zstandard.train_dictionary(
+            args.dictionary_size, [msg.text.encode() for msg in samples]
+        )
+        dictionary_path = args.save_dictionary or Path(
+            tempfile.mkstemp(suffix=".zdict")[1]
+        )
+        dictionary_path.write_bytes(dictionary.as_bytes())
+        codecs["compact + zstd"] = InboxCodec(
+            InboxCompression.ZSTD, None, args.min_text_bytes
+        )
+        codecs["compact + zstd + dictionary"] = InboxCodec(
+            InboxCompression.ZSTD, str(dictionary_path), args.min_text_bytes
+        )
+        if args.save_dictionary is None:
+            dictionary_path.unlink()
+        else:
+            print(f"dictionary saved to {dictionary_path}")
+    for name, codec in codecs.items():
+        variants[name] = (partial(encode_entry, codec), len)
+
+    print(
+        f"{'entry':<28} | {'value, B/msg':>12} | {'table, B/msg':>12} | "
+        f"{'changelog, B/msg':>16}"
+    )
+    for name, (make_value, changelog_size) in variants.items():
+        memory, on_wire = measure(messages, make_value, changelog_size)
+        in_table = measure_table(messages, make_value)
+        print(
+            f"{name:<28} | {memory:>12.1f} | {in_table:>12.1f} | {on_wire:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
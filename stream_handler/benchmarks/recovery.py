@@ -0,0 +1,122 @@
+"""
+Бенчмарк времени восстановления таблицы при старте воркера.
+
+Запуск из каталога stream_handler:
+    python -m benchmarks.recovery --keys 200000 --tail 0.01
+
+Сравнивает два сценария для таблицы заданного размера:
+- memory://: воркер проигрывает весь changelog;
+- rocksdb://: воркер открывает локальную базу с последним чекпоинтом
+  и проигрывает только хвост changelog после сохраненного оффсета.
+Kafka не требуется, события changelog генерируются в памяти.
+"""
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from types import SimpleNamespace
+
+import faust
+from faust.types import TP
+
+PARTITIONS: int = 3
+TABLE_NAME: str = "bench_table"
+RECOVERY_BUFFER_SIZE: int = 1000
+
+
+def make_changelog(keys: int, value_size: int, first_offset: int = 0) -> list:
+    value = {"text": "x" * value_size}
+    raw_value = json.dumps(value).encode()
+    events = []
+    for i in range(keys):
+        partition = i % PARTITIONS
+        key = f"user-{i}"
+        events.append(
+            SimpleNamespace(
+                key=key,
+                value=value,
+                message=SimpleNamespace(
+                    key=key.encode(),
+                    value=raw_value,
+                    partition=partition,
+                    offset=first_offset + i // PARTITIONS,
+                    tp=TP(f"bench-{TABLE_NAME}-changelog", partition),
+                ),
+            )
+        )
+    return events
+
+
+def make_table(store: str, datadir: str) -> faust.Table:
+    app = faust.App("bench", store=store, datadir=datadir)
+    return app.Table(TABLE_NAME, partitions=PARTITIONS)
+
+
+def replay(table: faust.Table, events: list) -> None:
+    for i in range(0, len(events), RECOVERY_BUFFER_SIZE):
+        table.apply_changelog_batch(events[i : i + RECOVERY_BUFFER_SIZE])
+
+
+def close_store(table: faust.Table) -> None:
+    """
+    Закрытие баз RocksDB таблицы, как при остановке воркера.
+
+    Пока база открыта, она держит блокировку LOCK, и повторно открыть ее
+    в том же каталоге нельзя.
+    """
+    for db in table.data._dbs.values():
+        db.close()
+    table.data._dbs.clear()
+
+
+def recover_from_memory(events: list, datadir: str) -> float:
+    started = time.perf_counter()
+    replay(make_table("memory://", datadir), events)
+    return time.perf_counter() - started
+
+
+def recover_from_checkpoint(events: list, tail: list, datadir: str) -> float:
+    table = make_table("rocksdb://", datadir)
+    replay(table, events)  # NOTE: состояние до рестарта
+    close_store(table)
+
+    started = time.perf_counter()
+    table = make_table("rocksdb://", datadir)
+    for partition in range(PARTITIONS):
+        table.data.persisted_offset(TP(f"bench-{TABLE_NAME}-changelog", partition))
+    replay(table, tail)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=200_000)
+    parser.add_argument("--value-size", type=int, default=100)
+    parser.add_argument(
+        "--tail", type=float, default=0.01, help="доля changelog после чекпоинта"
+    )
+    args = parser.parse_args()
+
+    events = make_changelog(args.keys, args.value_size)
+    tail_size = int(args.keys * args.tail)
+    tail = make_changelog(
+        tail_size, args.value_size, first_offset=args.keys // PARTITIONS + 1
+    )
+
+    datadir = tempfile.mkdtemp(prefix="faust-recovery-")
+    try:
+        memory = recover_from_memory(events, datadir)
+        checkpoint = recover_from_checkpoint(events, tail, datadir)
+    finally:
+        shutil.rmtree(datadir, ignore_errors=True)
+
+    print(f"table size: {args.keys} keys, changelog tail: {tail_size} events")
+    print(f"{'store':<32} | {'seconds to ready':>16}")
+    print(f"{'memory:// (full replay)':<32} | {memory:>16.3f}")
+    print(f"{'rocksdb:// (checkpoint + tail)':<32} | {checkpoint:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Бенчмарк запуска воркера: время до первого обработанного сообщения.
+
+Запуск из каталога stream_handler:
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --compare benchmarks/results/startup-1a2b3c4.json
+
+Каждый запуск - отдельный процесс интерпретатора (холодный старт), для
+режимов APP_MODE=development и APP_MODE=production. Процесс импортирует
+app.main и подает одно сообщение агенту цензуры через канал в памяти, как
+в benchmarks.agents: Kafka не требуется, поэтому этапы worker_started и
+tables_recovered не измеряются. Для каждого режима выводит медиану этапов
+imports, app_ready и first_message (секунды от начала импорта app.main;
+first_message включает построение автомата и таблицы нормализации).
+Результаты сохраняются в benchmarks/results/startup-<коммит>.json, с ними
+можно сравнить следующий запуск через --compare.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import RESULTS_DIR, current_commit
+
+MODES: tuple[str, ...] = ("development", "production")
+PHASES: tuple[str, ...] = ("imports", "app_ready", "first_message")
+
+
+async def first_message() -> None:
+    from app.main import app
+    from app.src.core.startup import STARTUP
+    from app.src.core.types import Message
+    from app.src.dependencies import DEPENDENCIES
+
+    from .agents import to_message
+    from .censor_batch import FakeTopic
+
+    DEPENDENCIES.topics.messages_filtered = FakeTopic(0)
+    agent_name = next(
+        name
+        for name in ("censor_agent", "censor_and_store_messages")
+        if f"app.src.agents.{name}" in app.agents
+    )
+    agent = app.agents[f"app.src.agents.{agent_name}"]
+    app.flow_control.resume()
+    stream = agent.stream(channel=app.channel())
+    actor = asyncio.ensure_future(agent.fun(stream))
+    try:
+        msg = Message(sender_id="1", recipient_id="2", text="hello world", timestamp=0)
+        await stream.channel.put(await stream.channel.decode(to_message("2", msg, 0)))
+        # NOTE: этап first_message отмечает StartupSensor при подтверждении события
+        while "first_message" not in STARTUP.phases:
+            if actor.done():
+                actor.result()
+                raise RuntimeError(f"{agent_name} stopped before the first message")
+            await asyncio.sleep(0.001)
+    finally:
+        actor.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await actor
+
+
+def child() -> None:
+    """
+    Один холодный запуск: этапы выводятся в stdout одной строкой JSON.
+    """
+    from app.src.core.startup import STARTUP
+
+    from app.main import app
+    from app.src.dependencies import DEPENDENCIES
+
+    DEPENDENCIES.logger.disabled = True
+    app.loop.run_until_complete(first_message())
+    print(json.dumps(STARTUP.phases))
+
+
+def run(mode: str) -> dict[str, float]:
+    env = {**os.environ, "APP_MODE": mode, "DATA_STORE": "memory://"}
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def print_results(results: dict[str, dict], baseline: dict[str, dict]) -> None:
+    print(f"{'mode':>12} | " + " | ".join(f"{phase:>16}" for phase in PHASES))
+    for mode, result in results.items():
+        cells = []
+        for phase in PHASES:
+            cell = f"{result[phase]:.3f}"
+            previous = baseline.get(mode, {}).get(phase)
+            if previous:
+                cell += f" ({(result[phase] - previous) / previous:+.0%})"
+            cells.append(f"{cell:>16}")
+        print(f"{mode:>12} | " + " | ".join(cells))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--mode", choices=MODES, action="append")
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    results: dict[str, dict] = {}
+    for mode in args.mode or MODES:
+        runs = [run(mode) for _ in range(args.runs)]
+        results[mode] = {
+            phase: statistics.median(phases[phase] for phases in runs)
+            for phase in PHASES
+        }
+
+    baseline = json.loads(args.compare.read_text())["results"] if args.compare else {}
+    print_results(results, baseline)
+
+    commit = current_commit()
+    output = args.output or RESULTS_DIR / f"startup-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "date": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "params": {"runs": args.runs},
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()